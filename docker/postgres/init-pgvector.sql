@@ -7,6 +7,17 @@ CREATE EXTENSION IF NOT EXISTS vector;
 -- Connect to the database
 \c postgres
 
+-- Native enums for low-cardinality columns
+DO $$ BEGIN
+    CREATE TYPE filing_type AS ENUM ('10-K', '10-Q');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+DO $$ BEGIN
+    CREATE TYPE chunk_content_type AS ENUM ('text', 'table');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
 -- Create tables for document storage
 CREATE TABLE IF NOT EXISTS companies (
     ticker TEXT PRIMARY KEY,
@@ -15,33 +26,36 @@ CREATE TABLE IF NOT EXISTS companies (
 
 CREATE TABLE IF NOT EXISTS documents (
     document_id TEXT PRIMARY KEY,
-    ticker TEXT REFERENCES companies(ticker),
+    ticker TEXT REFERENCES companies(ticker) ON DELETE CASCADE,
     year INTEGER,
     quarter INTEGER,
-    filing_type TEXT,
+    filing_type filing_type,
     filing_date TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS ix_documents_ticker_year_quarter ON documents (ticker, year, quarter);
+
 CREATE TABLE IF NOT EXISTS document_chunks (
     chunk_id TEXT PRIMARY KEY,
-    document_id TEXT REFERENCES documents(document_id),
-    content TEXT,
-    content_type TEXT,
-    location TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    document_id TEXT REFERENCES documents(document_id) ON DELETE CASCADE,
+    content TEXT COMPRESSION lz4,
+    content_type chunk_content_type,
+    location TEXT
 );
 
 -- Create table for vector embeddings
 CREATE TABLE IF NOT EXISTS chunk_embeddings (
     id SERIAL PRIMARY KEY,
-    chunk_id TEXT REFERENCES document_chunks(chunk_id),
-    embedding vector(3072),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    chunk_id TEXT UNIQUE REFERENCES document_chunks(chunk_id) ON DELETE CASCADE,
+    embedding halfvec(3072)
 );
 
--- Create index for vector similarity search
-CREATE INDEX IF NOT EXISTS chunk_embeddings_embedding_idx ON chunk_embeddings USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- Create index for vector similarity search (halfvec supports up to 4000 dims)
+CREATE INDEX IF NOT EXISTS chunk_embeddings_embedding_idx ON chunk_embeddings USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- Binary-quantized index for a Hamming-distance first pass; candidates are re-ranked by cosine distance
+CREATE INDEX IF NOT EXISTS chunk_embeddings_embedding_bit_idx ON chunk_embeddings USING hnsw ((binary_quantize(embedding)::bit(3072)) bit_hamming_ops);
 
 -- Create tables for test suites and evaluation
 CREATE TABLE IF NOT EXISTS test_suites (
@@ -77,17 +91,16 @@ CREATE TABLE IF NOT EXISTS evaluation_answers (
 -- Create tables for document content
 CREATE TABLE IF NOT EXISTS text_chunks (
     chunk_id TEXT PRIMARY KEY,
-    document_id TEXT REFERENCES documents(document_id),
-    text TEXT,
+    document_id TEXT REFERENCES documents(document_id) ON DELETE CASCADE,
+    text TEXT COMPRESSION lz4,
     section TEXT,
-    page_number INTEGER,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    page_number INTEGER
 );
 
 CREATE TABLE IF NOT EXISTS tables (
     chunk_id TEXT PRIMARY KEY,
-    document_id TEXT REFERENCES documents(document_id),
-    table_html TEXT,
+    document_id TEXT REFERENCES documents(document_id) ON DELETE CASCADE,
+    table_html TEXT COMPRESSION lz4,
     table_data JSONB,
     caption TEXT,
     section TEXT,
@@ -97,7 +110,7 @@ CREATE TABLE IF NOT EXISTS tables (
 
 CREATE TABLE IF NOT EXISTS charts (
     chunk_id TEXT PRIMARY KEY,
-    document_id TEXT REFERENCES documents(document_id),
+    document_id TEXT REFERENCES documents(document_id) ON DELETE CASCADE,
     chart_data JSONB,
     caption TEXT,
     section TEXT,
@@ -105,6 +118,13 @@ CREATE TABLE IF NOT EXISTS charts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Index foreign keys used for lookups and cascading deletes; documents.ticker
+-- is covered by ix_documents_ticker_year_quarter
+CREATE INDEX IF NOT EXISTS ix_document_chunks_document_id ON document_chunks (document_id);
+CREATE INDEX IF NOT EXISTS ix_text_chunks_document_id ON text_chunks (document_id);
+CREATE INDEX IF NOT EXISTS ix_tables_document_id ON tables (document_id);
+CREATE INDEX IF NOT EXISTS ix_charts_document_id ON charts (document_id);
+
 -- Create user for application
 -- CREATE USER postgres WITH PASSWORD 'postgres';
 -- GRANT ALL PRIVILEGES ON DATABASE postgres TO postgres;
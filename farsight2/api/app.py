@@ -1,40 +1,44 @@
 """FastAPI application for the Farsight2 API."""
 
+import asyncio
 import logging
-import os
-from typing import Dict, List, Optional
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from sqlalchemy.orm import Session
 
+from farsight2.config import LOG_LEVEL, OPENAI_API_KEY
 from farsight2.document_processing.edgar_client import EdgarClient
 from farsight2.document_processing.document_processor import DocumentProcessor
 from farsight2.embedding.unified_embedding_service import UnifiedEmbeddingService
 from farsight2.models.models import (
     DocumentMetadata,
     FactValue,
+    FilingType,
     ParsedDocument,
+    QueryAnalysis,
     RelevantChunk,
 )
 from farsight2.query_processing.query_analyzer import QueryAnalyzer
 from farsight2.query_processing.document_selector import DocumentSelector
 from farsight2.query_processing.content_retriever import ContentRetriever
 from farsight2.query_processing.response_generator import ResponseGenerator
+from farsight2.query_processing.query_cache import QueryCache
 from farsight2.database.db import get_db_session, init_db
 from farsight2.database.repository import (
     DocumentRepository,
     FactRepository,
 )
-from dotenv import load_dotenv
-import traceback
 from farsight2.database.unified_repository import UnifiedRepository
-load_dotenv()
-from farsight2.config import OPENAI_API_KEY
 
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -42,16 +46,81 @@ app = FastAPI(
     title="Farsight2 API",
     description="API for processing and querying 10-K/10-Q filings",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
+)
+
+
+_FILING_TYPES = frozenset(FilingType)
+_QUARTERS = (1, 2, 3, 4)
+# Every (quarter, filing type) pair a fact value can be reported under
+_QUARTER_FILING_COMBOS: tuple[tuple[int, str], ...] = tuple(
+    (quarter, filing_type) for quarter in _QUARTERS for filing_type in FilingType
 )
 
+# Worker threads for the blocking pipeline stages offloaded from the event loop
+EXECUTOR_MAX_WORKERS = 32
+
+
+def _query_cache_scope(
+    query_analysis: QueryAnalysis,
+) -> Tuple[FrozenSet[str], FrozenSet[int], FrozenSet[int]]:
+    """
+    Get the part of a query that a cached response must match exactly.
+    Queries differing only in company, year or quarter embed almost identically.
+    """
+    return (
+        frozenset(query_analysis.companies),
+        frozenset(query_analysis.years),
+        frozenset(query_analysis.quarters),
+    )
+
+
+def _build_shared_components(api_key: str) -> Dict[str, Any]:
+    """
+    Build the components that do not depend on a request's database session.
+    These are constructed once at startup and reused across requests.
+    """
+    unified_repository = UnifiedRepository()
+    embedding_service = UnifiedEmbeddingService(
+        api_key=api_key, repository=unified_repository
+    )
+
+    return {
+        "edgar_client": EdgarClient(),
+        "document_processor": DocumentProcessor(),
+        "embedding_service": embedding_service,
+        "query_analyzer": QueryAnalyzer(api_key=api_key),
+        "document_selector": DocumentSelector(),
+        "content_retriever": ContentRetriever(embedding_service, unified_repository),
+        "response_generator": ResponseGenerator(api_key=api_key),
+        "unified_repository": unified_repository,
+        "query_cache": QueryCache(),
+        "fact_search_cache": QueryCache(max_entries=256),
+    }
+
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the database when the application starts."""
+    """Initialize the database and shared components when the application starts."""
+    # Blocking pipeline stages run in the default executor via asyncio.to_thread
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=EXECUTOR_MAX_WORKERS)
+    )
     init_db()
     logger.info("Database initialized")
 
+    # DB-agnostic components shared by every request
+    app.state.api_key = OPENAI_API_KEY
+    app.state.components = _build_shared_components(app.state.api_key)
+    logger.info("Shared components initialized")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections held by the shared components."""
+    await app.state.components["edgar_client"].aclose()
+
 
 # Request and response models
 class ProcessDocumentRequest(BaseModel):
@@ -71,7 +140,7 @@ class ProcessDocumentResponse(BaseModel):
     year: int = Field(..., description="Filing year")
     quarter: Optional[int] = Field(None, description="Filing quarter (for 10-Q)")
     filing_type: str = Field(..., description="Filing type (10-K or 10-Q)")
-    filing_date: str = Field(..., description="Filing date")
+    filing_date: Optional[str] = Field(None, description="Filing date")
     status: str = Field(..., description="Processing status")
 
 
@@ -84,6 +153,8 @@ class QueryRequest(BaseModel):
 class CitationModel(BaseModel):
     """Model for citation information in query responses."""
 
+    model_config = ConfigDict(from_attributes=True)
+
     document_id: Optional[str] = Field(None, description="Document ID")
     location: Optional[str] = Field(None, description="Location in the document")
     content: Optional[str] = Field(None, description="Cited content")
@@ -91,6 +162,9 @@ class CitationModel(BaseModel):
     fact_id: Optional[str] = Field(None, description="Fact ID")
 
 
+_CITATIONS_ADAPTER = TypeAdapter(List[CitationModel])
+
+
 class QueryResponse(BaseModel):
     """Response model for query results with citations."""
 
@@ -102,45 +176,37 @@ class QueryResponse(BaseModel):
     facts_used: List[FactValue] = Field(..., description="Facts used for the query")
 
 
+@dataclass(frozen=True, slots=True)
+class Components:
+    """Application components used by the API endpoints."""
+
+    edgar_client: EdgarClient
+    document_processor: DocumentProcessor
+    embedding_service: UnifiedEmbeddingService
+    query_analyzer: QueryAnalyzer
+    document_selector: DocumentSelector
+    content_retriever: ContentRetriever
+    response_generator: ResponseGenerator
+    unified_repository: UnifiedRepository
+    query_cache: QueryCache
+    fact_search_cache: QueryCache
+    document_repo: DocumentRepository
+    fact_repo: FactRepository
+
+
 # Dependency for getting components
-def get_components(db: Session = Depends(get_db_session)):
+def get_components(
+    request: Request, db: Session = Depends(get_db_session)
+) -> Components:
     """
     Dependency injection for application components.
-    Initializes and provides access to all major system components.
+    Returns the shared components plus the repositories bound to this request's session.
     """
-    # Initialize components
-    api_key = OPENAI_API_KEY
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OpenAI API key not found")
-
-    # Create repositories
-    document_repo = DocumentRepository(db)
-    fact_repo = FactRepository(db)
-
-    unified_repository = UnifiedRepository()
-    # Create components
-    edgar_client = EdgarClient()
-    document_processor = DocumentProcessor()
-    embedding_service = UnifiedEmbeddingService(
-        api_key=api_key, repository=unified_repository
+    return Components(
+        **request.app.state.components,
+        document_repo=DocumentRepository(db),
+        fact_repo=FactRepository(db),
     )
-    query_analyzer = QueryAnalyzer(api_key=api_key)
-    document_selector = DocumentSelector()
-    content_retriever = ContentRetriever(embedding_service, unified_repository)
-    response_generator = ResponseGenerator(api_key=api_key)
-
-    return {
-        "edgar_client": edgar_client,
-        "document_processor": document_processor,
-        "embedding_service": embedding_service,
-        "query_analyzer": query_analyzer,
-        "document_selector": document_selector,
-        "content_retriever": content_retriever,
-        "response_generator": response_generator,
-        "document_repo": document_repo,
-        "unified_repository": unified_repository,
-        "fact_repo": fact_repo,
-    }
 
 
 @app.get("/")
@@ -152,7 +218,7 @@ async def root():
 @app.post("/process", response_model=ProcessDocumentResponse)
 async def process_document(
     request: ProcessDocumentRequest,
-    components=Depends(get_components),
+    components: Components = Depends(get_components),
 ):
     """
     Process a 10-K/10-Q document.
@@ -167,51 +233,62 @@ async def process_document(
     """
     try:
         # Get components
-        edgar_client: EdgarClient = components["edgar_client"]
-        document_processor: DocumentProcessor = components["document_processor"]
-        embedding_service: UnifiedEmbeddingService = components["embedding_service"]
-        document_repo: DocumentRepository = components["document_repo"]
-        unified_repository: UnifiedRepository = components["unified_repository"]
+        edgar_client: EdgarClient = components.edgar_client
+        document_processor: DocumentProcessor = components.document_processor
+        embedding_service: UnifiedEmbeddingService = components.embedding_service
+        unified_repository: UnifiedRepository = components.unified_repository
 
         # Validate filing type
-        if request.filing_type not in ["10-K", "10-Q"]:
+        if request.filing_type not in _FILING_TYPES:
             raise HTTPException(
                 status_code=400, detail="Invalid filing type. Must be 10-K or 10-Q"
             )
 
-        # Validate quarter
-        if request.quarter not in [1, 2, 3, 4]:
+        # Validate quarter - only 10-Q filings are quarterly
+        if request.filing_type == FilingType.TEN_Q and request.quarter not in _QUARTERS:
             raise HTTPException(status_code=400, detail="Quarter must be 1, 2, 3, or 4")
+        if request.filing_type == FilingType.TEN_K:
+            request.quarter = None
+
+        # Check if document already exists - return early if it does
+        if document := await asyncio.to_thread(
+            unified_repository.get_document,
+            request.ticker,
+            request.year,
+            request.quarter,
+            request.filing_type,
+        ):
+            filing_date_iso = (
+                document.filing_date.isoformat() if document.filing_date else None
+            )
+            return ProcessDocumentResponse(
+                document_id=document.document_id,
+                ticker=request.ticker,
+                year=request.year,
+                quarter=request.quarter,
+                filing_type=request.filing_type,
+                filing_date=filing_date_iso,
+                status="success",
+            )
 
         # Get company filings
         try:
-            edgar_client.get_company_filings(request.ticker)
+            await edgar_client.aget_company_filings(request.ticker)
         except Exception as e:
             logger.error(f"Error getting company filings: {e}")
             raise HTTPException(
                 status_code=500, detail=f"Error getting company filings: {str(e)}"
             )
 
-        # Check if document already exists - return early if it does
-        if document := unified_repository.get_document(
-            request.ticker, request.year, request.quarter, request.filing_type
-        ):
-            return {
-                "document_id": document.document_id,
-                "ticker": request.ticker,
-                "year": request.year,
-                "quarter": request.quarter,
-                "filing_type": request.filing_type,
-                "filing_date": document.filing_date.isoformat()
-                if document.filing_date
-                else None,
-                "status": "success",
-            }
-
         try:
             # First time you see the company, download the XBRL facts
-            if unified_repository.get_company(request.ticker) is None:
-                facts, _ = edgar_client.download_xbrl_facts(request.ticker)
+            company = await asyncio.to_thread(
+                unified_repository.get_company, request.ticker
+            )
+            if company is None:
+                facts, _ = await asyncio.to_thread(
+                    edgar_client.download_xbrl_facts, request.ticker
+                )
             else:
                 facts = []
         except Exception as e:
@@ -222,13 +299,13 @@ async def process_document(
 
         try:
             # Download the actual filing document from SEC EDGAR
-            filing_result: Dict[str, str | DocumentMetadata] = (
-                edgar_client.download_filing(
-                    ticker=request.ticker,
-                    filing_type=request.filing_type,
-                    year=request.year,
-                    quarter=request.quarter,
-                )
+            filing_result: Dict[
+                str, str | DocumentMetadata
+            ] = await edgar_client.adownload_filing(
+                ticker=request.ticker,
+                filing_type=request.filing_type,
+                year=request.year,
+                quarter=request.quarter,
             )
 
         except Exception as e:
@@ -239,8 +316,10 @@ async def process_document(
 
         # Process the filing - extract sections, tables, etc.
         try:
-            parsed_document: ParsedDocument = document_processor.process_filing(
-                content=filing_result["content"], metadata=filing_result["metadata"]
+            parsed_document: ParsedDocument = await asyncio.to_thread(
+                document_processor.process_filing,
+                content=filing_result["content"],
+                metadata=filing_result["metadata"],
             )
 
         except Exception as e:
@@ -250,9 +329,12 @@ async def process_document(
                 status_code=500, detail=f"Error processing filing: {str(e)}"
             )
 
-        # Save document metadata to database
+        # Save document metadata to database; committed before the chunks
+        # referencing it are written from the embedding worker threads
         try:
-            document_repo.create_document(parsed_document.metadata)
+            await asyncio.to_thread(
+                unified_repository.create_document, parsed_document.metadata
+            )
         except Exception as e:
             logger.error(f"Error saving document to database: {e}")
             logger.error(traceback.format_exc())
@@ -260,40 +342,45 @@ async def process_document(
                 status_code=500, detail=f"Error saving document to database: {str(e)}"
             )
 
-        # Generate embeddings for document chunks
-        try:
-            embedding_service.embed_document(parsed_document)
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            logger.error(traceback.format_exc())
+        # Generate embeddings for document chunks and XBRL facts concurrently
+        document_result, facts_result = await asyncio.gather(
+            embedding_service.aembed_document(parsed_document),
+            embedding_service.aembed_facts(facts) if facts else asyncio.sleep(0),
+            return_exceptions=True,
+        )
+
+        # Cached answers and fact searches may predate the new data
+        components.query_cache.clear()
+        components.fact_search_cache.clear()
+
+        if isinstance(document_result, Exception):
+            logger.error(f"Error generating embeddings: {document_result}")
+            logger.error("".join(traceback.format_exception(document_result)))
             raise HTTPException(
-                status_code=500, detail=f"Error generating embeddings: {str(e)}"
+                status_code=500,
+                detail=f"Error generating embeddings: {str(document_result)}",
             )
 
-        # Generate embeddings for XBRL facts if available
-        try:
-            if len(facts) > 0:
-                embedding_service.embed_facts(facts)
-        except Exception as e:
-            logger.error(f"Error saving document to unified repository: {e}")
-            logger.error(traceback.format_exc())
+        if isinstance(facts_result, Exception):
+            logger.error(f"Error saving document to unified repository: {facts_result}")
+            logger.error("".join(traceback.format_exception(facts_result)))
             raise HTTPException(
                 status_code=500,
-                detail=f"Error saving document to unified repository: {str(e)}",
+                detail=f"Error saving document to unified repository: {str(facts_result)}",
             )
 
         # Return response with document details
-        return {
-            "document_id": parsed_document.document_id,
-            "ticker": request.ticker,
-            "year": request.year,
-            "quarter": request.quarter,
-            "filing_type": request.filing_type,
-            "filing_date": parsed_document.metadata.filing_date.isoformat()
-            if parsed_document.metadata.filing_date
-            else None,
-            "status": "success",
-        }
+        filing_date = parsed_document.metadata.filing_date
+        filing_date_iso = filing_date.isoformat() if filing_date else None
+        return ProcessDocumentResponse(
+            document_id=parsed_document.document_id,
+            ticker=request.ticker,
+            year=request.year,
+            quarter=request.quarter,
+            filing_type=request.filing_type,
+            filing_date=filing_date_iso,
+            status="success",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -307,7 +394,7 @@ async def process_document(
 @app.post("/query", response_model=QueryResponse)
 async def query(
     request: QueryRequest,
-    components=Depends(get_components),
+    components: Components = Depends(get_components),
 ):
     """
     Query the system with a natural language question.
@@ -320,25 +407,37 @@ async def query(
     """
     try:
         # Get components
-        query_analyzer: QueryAnalyzer = components["query_analyzer"]
-        document_selector: DocumentSelector = components["document_selector"]
-        content_retriever: ContentRetriever = components["content_retriever"]
-        response_generator: ResponseGenerator = components["response_generator"]
-        fact_repo: FactRepository = components["fact_repo"]
-        unified_repository: UnifiedRepository = components["unified_repository"]
+        query_analyzer: QueryAnalyzer = components.query_analyzer
+        document_selector: DocumentSelector = components.document_selector
+        content_retriever: ContentRetriever = components.content_retriever
+        response_generator: ResponseGenerator = components.response_generator
+        fact_repo: FactRepository = components.fact_repo
+        unified_repository: UnifiedRepository = components.unified_repository
+        query_cache: QueryCache = components.query_cache
+        fact_search_cache: QueryCache = components.fact_search_cache
 
         # Analyze the query - extract entities, intent, and generate embedding
         try:
-            query_analysis = query_analyzer.analyze_query(request.query)
+            query_analysis = await asyncio.to_thread(
+                query_analyzer.analyze_query, request.query
+            )
         except Exception as e:
             logger.error(f"Error analyzing query: {e}")
             raise HTTPException(
                 status_code=500, detail=f"Error analyzing query: {str(e)}"
             )
 
+        # Reuse the response to a semantically similar query about the same
+        # companies and periods if one is cached
+        cache_scope = _query_cache_scope(query_analysis)
+        if cached_response := query_cache.get(query_analysis.embedding, cache_scope):
+            return ORJSONResponse(cached_response)
+
         # Select relevant documents based on query analysis
         try:
-            document_references = document_selector.select_documents(query_analysis)
+            document_references = await asyncio.to_thread(
+                document_selector.select_documents, query_analysis
+            )
         except Exception as e:
             logger.error(f"Error selecting documents: {e}")
             raise HTTPException(
@@ -353,48 +452,43 @@ async def query(
         # Retrieve relevant content from documents and XBRL facts
         try:
             # Get relevant document chunks using semantic search
-            relevant_chunks: List[RelevantChunk] = content_retriever.retrieve_content(
+            relevant_chunks: List[RelevantChunk] = await asyncio.to_thread(
+                content_retriever.retrieve_content,
                 query=request.query,
                 query_analysis=query_analysis,
                 document_references=document_references,
             )
 
-            relevant_doc_ids = set(
-                [chunk.chunk.document_id for chunk in relevant_chunks]
-            )
-            print(f"Relevant doc ids: {relevant_doc_ids}")
-            # Search for facts using the query embedding
-            relevant_facts = fact_repo.search_facts_by_embedding(
-                query_analysis.embedding
-            )
-            logger.info(f"Relevant facts: {relevant_facts}")
+            relevant_doc_ids = {chunk.chunk.document_id for chunk in relevant_chunks}
+            logger.debug("Relevant doc ids: %s", relevant_doc_ids)
+            # Search for facts using the query embedding, reusing the results
+            # of a near-identical recent query when there is one
+            relevant_facts = fact_search_cache.get(query_analysis.embedding)
+            if relevant_facts is None:
+                relevant_facts = await asyncio.to_thread(
+                    fact_repo.search_facts_by_embedding, query_analysis.embedding
+                )
+                fact_search_cache.put(query_analysis.embedding, relevant_facts)
+            logger.info(f"Found {len(relevant_facts)} relevant facts")
+            logger.debug("Relevant facts: %s", relevant_facts)
 
             # Get fact values for specific companies and years if provided in the query
-            fact_values = []
-
-            for company in query_analysis.companies:
-                for year in query_analysis.years:
-                    for quarter in [1, 2, 3, 4]:
-                        for filing_type in ["10K", "10Q"]:
-                            for i, fact in enumerate(relevant_facts):
-                                # Get fact values for this company and year
-                                values_for_fact = (
-                                    unified_repository.get_fact_values_by_details(
-                                        fact.fact_id,
-                                        company,
-                                        year,
-                                        quarter,
-                                        filing_type,
-                                    )
-                                )
-                                if values_for_fact:
-                                    fact_values.extend(
-                                        [
-                                            (fact_value, relevant_facts[i].description)
-                                            for fact_value in values_for_fact
-                                        ]
-                                    )
-            logger.info(f"Fact values: {fact_values}")
+            fact_descriptions = {
+                fact.fact_id: fact.description for fact in relevant_facts
+            }
+            values_for_facts = await asyncio.to_thread(
+                unified_repository.get_fact_values_bulk,
+                list(fact_descriptions),
+                query_analysis.companies,
+                query_analysis.years,
+                _QUARTER_FILING_COMBOS,
+            )
+            fact_values = [
+                (fact_value, fact_descriptions[fact_value.fact_id])
+                for fact_value in values_for_facts
+            ]
+            logger.info(f"Found {len(fact_values)} fact values")
+            logger.debug("Fact values: %s", fact_values)
 
         except Exception as e:
             logger.error(f"Error retrieving content: {e}")
@@ -411,7 +505,8 @@ async def query(
 
         # Generate comprehensive response with citations
         try:
-            formatted_response = response_generator.generate_response(
+            formatted_response = await asyncio.to_thread(
+                response_generator.generate_response,
                 query=request.query,
                 relevant_chunks=relevant_chunks,
                 relevant_fact_values=fact_values,
@@ -424,29 +519,20 @@ async def query(
             )
 
         # Convert citations to the response model format
-        citations = [
-            CitationModel(
-                document_id=citation.document_id,
-
-                location=citation.location,
-                content=citation.content,
-                content_type=citation.content_type,  # Added content type for better source tracking
-                fact_id=citation.fact_id
-                if hasattr(citation, "fact_id")
-                else None,  # Added fact ID for XBRL citations
-            )
-            for citation in formatted_response.citations
-        ]
-
-        # Return response with enhanced metadata
-        return {
-            "response": formatted_response.response,
-            "citations": citations,
-            "documents_used": [doc.document_id for doc in document_references],
-            "facts_used": [fact_value[0] for fact_value in fact_values]
-            if fact_values
-            else [],
-        }
+        citations = _CITATIONS_ADAPTER.validate_python(
+            formatted_response.citations, from_attributes=True
+        )
+
+        # Return response with enhanced metadata. The fields are already
+        # validated models, so construct without a second validation pass
+        response = QueryResponse.model_construct(
+            response=formatted_response.response,
+            citations=citations,
+            documents_used=[doc.document_id for doc in document_references],
+            facts_used=[fact_value[0] for fact_value in fact_values],
+        ).model_dump(mode="json")
+        query_cache.put(query_analysis.embedding, response, cache_scope)
+        return ORJSONResponse(response)
     except HTTPException:
         raise
     except Exception as e:
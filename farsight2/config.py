@@ -1,26 +1,64 @@
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from functools import lru_cache
 import os
 
-load_dotenv()
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Application settings read from the environment."""
+
+    openai_api_key: str
+    database_url: str
+    vector_database_url: str
+    embedding_model: str
+    chat_model: str
+    log_level: str
+    auto_migrate: bool
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load and validate the settings once per process.
+
+    Returns:
+        Application settings
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-DATABASE_URL = os.getenv("DATABASE_URL")
-VECTOR_DATABASE_URL = os.getenv("VECTOR_DATABASE_URL")
-EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
-CHAT_MODEL = os.getenv("CHAT_MODEL")
+    Raises:
+        ValueError: If a required environment variable is not set
+    """
+    load_dotenv()
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY is not set")
+    required = {
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+        "DATABASE_URL": os.getenv("DATABASE_URL"),
+        "VECTOR_DATABASE_URL": os.getenv("VECTOR_DATABASE_URL"),
+        "EMBEDDING_MODEL": os.getenv("EMBEDDING_MODEL"),
+        "CHAT_MODEL": os.getenv("CHAT_MODEL"),
+    }
+    for name, value in required.items():
+        if not value:
+            raise ValueError(f"{name} is not set")
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL is not set")
+    return Settings(
+        openai_api_key=required["OPENAI_API_KEY"],
+        database_url=required["DATABASE_URL"],
+        vector_database_url=required["VECTOR_DATABASE_URL"],
+        embedding_model=required["EMBEDDING_MODEL"],
+        chat_model=required["CHAT_MODEL"],
+        log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        auto_migrate=os.getenv("FARSIGHT_AUTO_MIGRATE", "1").lower()
+        not in ("0", "false", "no"),
+    )
 
-if not VECTOR_DATABASE_URL:
-    raise ValueError("VECTOR_DATABASE_URL is not set")
 
-if not EMBEDDING_MODEL:
-    raise ValueError("EMBEDDING_MODEL is not set")
+_settings = get_settings()
 
-if not CHAT_MODEL:
-    raise ValueError("CHAT_MODEL is not set")
-    
\ No newline at end of file
+OPENAI_API_KEY = _settings.openai_api_key
+DATABASE_URL = _settings.database_url
+VECTOR_DATABASE_URL = _settings.vector_database_url
+EMBEDDING_MODEL = _settings.embedding_model
+CHAT_MODEL = _settings.chat_model
+LOG_LEVEL = _settings.log_level
+AUTO_MIGRATE = _settings.auto_migrate
@@ -5,43 +5,97 @@ This module provides functions for connecting to the database
 and initializing the database schema.
 """
 
-import os
 import logging
-from typing import Any, Dict
+from datetime import datetime
+from functools import lru_cache
+from threading import Event
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import unquote, urlsplit
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.schema import AddConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from farsight2.config import DATABASE_URL
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from farsight2.config import AUTO_MIGRATE, DATABASE_URL
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
-# Create engine and session
-
 # Create engine and session
 engine = create_engine(
     DATABASE_URL,
     pool_size=20,  # Increase from default 5
     max_overflow=20,  # Increase from default 10
     pool_timeout=60,  # Increase timeout from 30 seconds
-    pool_recycle=3600,  # Recycle connections after 1 hour
-    pool_pre_ping=True,  # Verify connections before using them
+    pool_recycle=1800,  # Recycle before typical upstream idle timeouts
+    # Detect dead connections with TCP keepalives instead of a per-checkout ping
+    pool_pre_ping=False,
+    # Send executemany inserts as large multi-row INSERT ... VALUES batches
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=10000,
+    connect_args={
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    },
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionFactory = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,  # Avoid reloading attributes after every commit
+    bind=engine,
+)
+# Thread-local sessions for long-lived repositories used from worker threads
+SessionLocal = scoped_session(SessionFactory)
 Base = declarative_base()
 
+# Large text columns read on every retrieval; lz4 decompresses faster than pglz
+LZ4_COMPRESSED_COLUMNS = (
+    ("document_chunks", "content"),
+    ("text_chunks", "text"),
+    ("tables", "table_html"),
+)
+
+# Indexes replaced by differently defined ones, dropped when migrating
+SUPERSEDED_INDEXES = ("facts_embedding_idx", "ix_documents_ticker")
+
+# Write-heavy tables that skip WAL while bulk ingest is enabled. No logged
+# table may reference them, or Postgres refuses to make them unlogged
+BULK_INGEST_TABLES = ("chunk_embeddings", "fact_values")
+
+# fact_values gets one partition per fiscal year from this year through next
+# year; other years land in the default partition
+FACT_VALUE_FIRST_YEAR = 2000
 
-def get_db_session():
+# Index whose order CLUSTER gives each fact_values partition
+FACT_VALUE_CLUSTER_INDEX = "ix_fact_values_ticker_year_period"
+
+# Hosts for which a failed connection most likely means Postgres is not running
+LOCAL_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+
+# Set once init_db has created the schema so later calls skip the checks
+_SCHEMA_READY = Event()
+
+
+def get_db_session() -> Iterator[Session]:
     """
-    Get a database session.
+    Get a database session for the duration of a unit of work.
 
-    Returns:
+    Usable as a FastAPI dependency. The session is committed when the caller
+    finishes, rolled back on error, and always closed.
+
+    Yields:
         SQLAlchemy session object
     """
-    session = SessionLocal()
+    session = SessionFactory()
     try:
-        return session
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
     finally:
         session.close()
 
@@ -49,12 +103,14 @@ def get_db_session():
 def test_connection():
     """Test database connection and provide helpful message if it fails."""
     try:
+        # Checking out a connection is enough; the dialect reads the server
+        # version when the first connection is made
         with engine.connect() as conn:
-            result = conn.execute(text("SELECT version()")).scalar()
-            logger.info(f"Connected to database: {result}")
+            version = ".".join(map(str, conn.dialect.server_version_info or ()))
+            logger.info(f"Connected to database: PostgreSQL {version}")
             return True
-    except Exception as e:
-        if "connection to server" in str(e) and "localhost" in str(e):
+    except OperationalError as e:
+        if engine.url.host in LOCAL_HOSTS:
             logger.error(
                 f"Database connection error: {str(e)}\n"
                 "If running outside Docker, make sure PostgreSQL is running locally.\n"
@@ -65,47 +121,231 @@ def test_connection():
         return False
 
 
-def init_db():
+def init_db(migrate: Optional[bool] = None):
     """
     Initialize the database schema.
 
-    This function checks if the database is properly set up and
-    creates the necessary tables if they don't exist.
+    This function checks if the database is properly set up, installs the
+    pgvector extension if needed and creates the necessary tables if they
+    don't exist. The schema work runs once per process.
+
+    Args:
+        migrate: Whether to create missing schema objects; defaults to the
+            FARSIGHT_AUTO_MIGRATE setting
     """
+    if migrate is None:
+        migrate = AUTO_MIGRATE
+    if migrate and _SCHEMA_READY.is_set():
+        return
+
     if not test_connection():
         raise Exception("Failed to connect to database")
 
     # Import models here to avoid circular imports
+    from farsight2.database import models
+
+    if not migrate:
+        logger.info("Skipping schema creation (FARSIGHT_AUTO_MIGRATE=0)")
+        return
+
+    # All schema work shares one transaction to keep startup round-trips down
+    with engine.begin() as conn:
+        _create_schema(conn, models)
+    _SCHEMA_READY.set()
+
+
+def set_bulk_ingest(enabled: bool) -> None:
+    """
+    Switch the write-heavy ingest tables between unlogged and logged.
+
+    Unlogged tables skip WAL but are truncated after a crash, so enable this
+    only for a backfill and disable it once the backfill finishes. Postgres
+    forbids a logged table from referencing an unlogged one, but an unlogged
+    table may reference logged ones; no table references these, so their
+    foreign keys stay in place and keep being enforced during the backfill.
+    Each switch takes an ACCESS EXCLUSIVE lock on the tables; run it as a
+    one-off admin step, not on startup.
+
+    Args:
+        enabled: Whether to make the tables unlogged
+    """
+    persistence = "UNLOGGED" if enabled else "LOGGED"
+    with engine.begin() as conn:
+        for table in BULK_INGEST_TABLES:
+            # Persistence is set per partition on partitioned tables
+            for name in _table_partitions(conn, table) or [table]:
+                conn.execute(text(f"ALTER TABLE {name} SET {persistence}"))
+    logger.info(f"Bulk ingest {'enabled' if enabled else 'disabled'}")
+
+
+def cluster_fact_values() -> None:
+    """
+    Rewrite every fact_values partition in ticker order and refresh statistics.
+
+    Values of one company then sit on adjacent pages, so per-ticker lookups
+    read few pages. CLUSTER takes an ACCESS EXCLUSIVE lock and rewrites the
+    table, and new rows are not kept in order, so run it as a one-off admin
+    step after large loads, not on startup.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"CLUSTER fact_values USING {FACT_VALUE_CLUSTER_INDEX}"))
+        conn.execute(text("ANALYZE fact_values"))
+    logger.info("Fact values clustered")
+
+
+def _create_schema(conn, models) -> None:
+    """Create the extension, tables, indexes and partitions that are missing."""
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
 
-    # Create tables
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=conn)
     logger.info("Database tables created successfully")
 
+    # create_all does not add indexes to tables that already exist, so build
+    # the HNSW indexes explicitly for databases created before they were declared
+    conn.execute(text("SET LOCAL maintenance_work_mem = '2GB'"))
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in (models.ChunkEmbedding.__table__, models.Fact.__table__):
+        for index in table.indexes:
+            if index.dialect_options["postgresql"]["using"] == "hnsw":
+                index.create(bind=conn, checkfirst=True)
+    logger.info("Vector indexes created successfully")
+
+    for index in models.Document.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+    # Duplicate fact values stored before the key existed would make the
+    # unique index fail; keep migrating without it rather than abort
+    for index in models.FactValue.__table__.indexes:
+        if index.unique:
+            try:
+                with conn.begin_nested():
+                    _drop_nulls_distinct_index(conn, index)
+                    index.create(bind=conn, checkfirst=True)
+            except IntegrityError as e:
+                logger.warning(f"Could not create {index.name}: {e.orig}")
+
+    _create_fact_value_partitions(conn)
+    _cascade_foreign_keys(conn)
+
+    # Only affects newly written values; existing rows keep their compression
+    for table, column in LZ4_COMPRESSED_COLUMNS:
+        conn.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4")
+        )
+
+
+def _table_partitions(conn, table: str) -> List[str]:
+    """Get the names of a table's partitions, empty if it is not partitioned."""
+    return list(
+        conn.execute(
+            text(
+                "SELECT inhrelid::regclass::text FROM pg_inherits "
+                "WHERE inhparent = to_regclass(:table)"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def _drop_nulls_distinct_index(conn, index) -> None:
+    """Drop an index declared NULLS NOT DISTINCT that was created without it.
+
+    Such an index never conflicts on rows with a NULL key column, so upserts
+    targeting it insert duplicates instead of updating.
+    """
+    if not index.dialect_options["postgresql"]["nulls_not_distinct"]:
+        return
+    stale = conn.execute(
+        text(
+            "SELECT NOT indnullsnotdistinct FROM pg_index "
+            "WHERE indexrelid = to_regclass(:index)"
+        ),
+        {"index": index.name},
+    ).scalar()
+    if stale:
+        conn.execute(text(f"DROP INDEX {index.name}"))
+        logger.info(f"Re-creating {index.name} with NULLS NOT DISTINCT")
+
+
+def _cascade_foreign_keys(conn) -> None:
+    """Re-create foreign keys declared ON DELETE CASCADE that do not cascade yet.
+
+    Databases created before the models declared the cascades have plain
+    foreign keys, which make deleting a parent with children fail.
+    """
+    for table in Base.metadata.sorted_tables:
+        for constraint in table.foreign_key_constraints:
+            if constraint.ondelete != "CASCADE":
+                continue
+            stale = (
+                conn.execute(
+                    text(
+                        "SELECT conname FROM pg_constraint WHERE contype = 'f' "
+                        "AND conrelid = to_regclass(:table) "
+                        "AND confrelid = to_regclass(:referred) "
+                        "AND conparentid = 0 AND confdeltype <> 'c'"
+                    ),
+                    {"table": table.name, "referred": constraint.referred_table.name},
+                )
+                .scalars()
+                .all()
+            )
+            if not stale:
+                continue
+            for name in stale:
+                conn.execute(text(f'ALTER TABLE {table.name} DROP CONSTRAINT "{name}"'))
+            conn.execute(AddConstraint(constraint))
+            logger.info(f"Foreign keys on {table.name} now cascade on delete")
+
 
+def _create_fact_value_partitions(conn) -> None:
+    """Create the yearly fact_values partitions that do not exist yet."""
+    partitioned = conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": "fact_values"},
+    ).scalar()
+    if not partitioned:
+        logger.warning(
+            "fact_values is not partitioned; recreate it to partition by fiscal_year"
+        )
+        return
+
+    for year in range(FACT_VALUE_FIRST_YEAR, datetime.now().year + 2):
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS fact_values_{year} PARTITION OF "
+                f"fact_values FOR VALUES FROM ({year}) TO ({year + 1})"
+            )
+        )
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS fact_values_default PARTITION OF "
+            "fact_values DEFAULT"
+        )
+    )
+    logger.info("Fact value partitions created successfully")
+
+
+@lru_cache(maxsize=1)
 def get_connection_params() -> Dict[str, Any]:
     """Get database connection parameters from the DATABASE_URL.
 
+    DATABASE_URL is fixed for the process lifetime, so it is parsed once and
+    every caller shares the returned dict; do not modify it.
+
     Returns:
         Dict[str, Any]: Database connection parameters
     """
-    # Parse the DATABASE_URL
     if "://" not in DATABASE_URL:
         return {}
 
-    # Split the URL into parts
-    url_parts = DATABASE_URL.split("://")[1].split("@")
-    auth_parts = url_parts[0].split(":")
-    host_parts = url_parts[1].split("/")
-    host_port = host_parts[0].split(":")
-
-    # Extract the parameters
-    params = {
-        "user": auth_parts[0],
-        "password": auth_parts[1],
-        "host": host_port[0],
-        "port": int(host_port[1]) if len(host_port) > 1 else 5432,
-        "database": host_parts[1],
+    url = urlsplit(DATABASE_URL)
+    return {
+        "user": unquote(url.username or ""),
+        "password": unquote(url.password or ""),
+        "host": url.hostname or "",
+        "port": url.port or 5432,
+        "database": url.path.lstrip("/"),
     }
-    return params
-
@@ -1,52 +1,36 @@
-"""Initialize the database."""
-
-import logging
-from sqlalchemy import text
-
-# Set up logging
-logger = logging.getLogger(__name__)
+"""Initialize the database.
 
+Run as a one-shot deploy step when FARSIGHT_AUTO_MIGRATE is disabled.
+Pass --bulk-ingest on before a backfill and --bulk-ingest off after it to
+switch the high-volume ingest tables between unlogged and logged, and
+--cluster-fact-values after large loads to re-sort fact values by ticker.
+"""
 
-def init_db():
-    """Initialize the database."""
-    # Import the models
-    from farsight2.database.db import Base, engine, test_connection
-
-    # Test connection
-    if not test_connection():
-        logger.error("Failed to connect to database")
-        return False
+import argparse
+import logging
 
-    # Ensure pgvector extension is installed
-    try:
-        with engine.connect() as conn:
-            # Check if pgvector is installed
-            result = conn.execute(
-                text(
-                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')"
-                )
-            )
-            if not result.scalar():
-                logger.info("Installing pgvector extension...")
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-                conn.commit()
-                logger.info("pgvector extension installed successfully")
-            else:
-                logger.info("pgvector extension is already installed")
-    except Exception as e:
-        logger.error(f"Error installing pgvector extension: {e}")
-        return False
+from farsight2.database.db import cluster_fact_values, init_db, set_bulk_ingest
 
-    # Create tables
-    try:
-        logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-        return True
-    except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
-        return False
+__all__ = ["cluster_fact_values", "init_db", "set_bulk_ingest"]
 
 
 if __name__ == "__main__":
-    init_db()
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Initialize the database")
+    parser.add_argument(
+        "--bulk-ingest",
+        choices=("on", "off"),
+        help="Make the ingest tables unlogged (on) or logged again (off)",
+    )
+    parser.add_argument(
+        "--cluster-fact-values",
+        action="store_true",
+        help="Rewrite fact_values in ticker order (locks the table)",
+    )
+    args = parser.parse_args()
+
+    init_db(migrate=True)
+    if args.bulk_ingest:
+        set_bulk_ingest(args.bulk_ingest == "on")
+    if args.cluster_fact_values:
+        cluster_fact_values()
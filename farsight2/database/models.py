@@ -2,13 +2,31 @@
 # They are used to create the database schema and to define the relationships between the tables.
 # They are not used in the API.
 
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text, JSON, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    ForeignKey,
+    DateTime,
+    Text,
+    Float,
+    Index,
+    Enum,
+    SmallInteger,
+    cast,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import BIT, HALFVEC
 
 
 from farsight2.database.db import Base
+from farsight2.models.models import FilingType
+
+# Native Postgres enums for low-cardinality text columns
+FILING_TYPE_ENUM = Enum(*(t.value for t in FilingType), name="filing_type")
+CONTENT_TYPE_ENUM = Enum("text", "table", name="chunk_content_type")
 
 
 class Company(Base):
@@ -19,7 +37,7 @@ class Company(Base):
     ticker = Column(String, primary_key=True)
     name = Column(String)
 
-    documents = relationship("Document", back_populates="company")
+    documents = relationship("Document", back_populates="company", passive_deletes=True)
 
     def __repr__(self) -> str:
         return f"<Company(ticker='{self.ticker}', name='{self.name}')>"
@@ -29,19 +47,29 @@ class Document(Base):
     """Document model."""
 
     __tablename__ = "documents"
+    # Serves ticker, (ticker, year) and (ticker, year, quarter) lookups
+    __table_args__ = (
+        Index("ix_documents_ticker_year_quarter", "ticker", "year", "quarter"),
+    )
 
     document_id = Column(String, primary_key=True)
-    ticker = Column(String, ForeignKey("companies.ticker"))
+    ticker = Column(String, ForeignKey("companies.ticker", ondelete="CASCADE"))
     year = Column(Integer)
     quarter = Column(Integer, nullable=True)
-    filing_type = Column(String)
+    filing_type = Column(FILING_TYPE_ENUM)
     filing_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
     company = relationship("Company", back_populates="documents")
-    chunks = relationship("DocumentChunk", back_populates="document")
-    text_chunks = relationship("TextChunkDB", back_populates="document")
-    tables = relationship("TableDB", back_populates="document")
+    # passive_deletes: the foreign keys cascade, so deleting a document must
+    # not load its children first
+    chunks = relationship(
+        "DocumentChunk", back_populates="document", passive_deletes=True
+    )
+    text_chunks = relationship(
+        "TextChunkDB", back_populates="document", passive_deletes=True
+    )
+    tables = relationship("TableDB", back_populates="document", passive_deletes=True)
 
     def __repr__(self) -> str:
         return f"<Document(document_id='{self.document_id}', ticker='{self.ticker}', year={self.year}, quarter={self.quarter}, filing_type='{self.filing_type}')>"
@@ -53,14 +81,17 @@ class DocumentChunk(Base):
     __tablename__ = "document_chunks"
 
     chunk_id = Column(String, primary_key=True)
-    document_id = Column(String, ForeignKey("documents.document_id"))
+    document_id = Column(
+        String, ForeignKey("documents.document_id", ondelete="CASCADE"), index=True
+    )
     content = Column(Text)
-    content_type = Column(String)
+    content_type = Column(CONTENT_TYPE_ENUM)
     location = Column(String)
-    created_at = Column(DateTime, server_default=func.now())
 
     document = relationship("Document", back_populates="chunks")
-    embedding = relationship("ChunkEmbedding", back_populates="chunk", uselist=False)
+    embedding = relationship(
+        "ChunkEmbedding", back_populates="chunk", uselist=False, passive_deletes=True
+    )
 
     def __repr__(self) -> str:
         return f"<DocumentChunk(chunk_id='{self.chunk_id}', document_id='{self.document_id}', content_type='{self.content_type}')>"
@@ -70,13 +101,23 @@ class ChunkEmbedding(Base):
     """Chunk embedding model."""
 
     __tablename__ = "chunk_embeddings"
+    __table_args__ = (
+        Index(
+            "chunk_embeddings_embedding_idx",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "halfvec_cosine_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    chunk_id = Column(String, ForeignKey("document_chunks.chunk_id"))
+    chunk_id = Column(
+        String, ForeignKey("document_chunks.chunk_id", ondelete="CASCADE"), unique=True
+    )
     embedding = Column(
-        Vector(3072)
-    )  # Using pgvector's Vector type with OpenAI's embedding dimension
-    created_at = Column(DateTime, server_default=func.now())
+        HALFVEC(3072)
+    )  # Half-precision pgvector type with OpenAI's embedding dimension
 
     chunk = relationship("DocumentChunk", back_populates="embedding")
 
@@ -84,17 +125,30 @@ class ChunkEmbedding(Base):
         return f"<ChunkEmbedding(id={self.id}, chunk_id='{self.chunk_id}')>"
 
 
+# Binary-quantized embedding (one bit per dimension) used for a cheap
+# Hamming-distance first pass before re-ranking by cosine distance
+EMBEDDING_BITS = cast(func.binary_quantize(ChunkEmbedding.embedding), BIT(3072))
+
+Index(
+    "chunk_embeddings_embedding_bit_idx",
+    EMBEDDING_BITS.label("embedding_bits"),
+    postgresql_using="hnsw",
+    postgresql_ops={"embedding_bits": "bit_hamming_ops"},
+)
+
+
 class TextChunkDB(Base):
     """Text chunk model."""
 
     __tablename__ = "text_chunks"
 
     chunk_id = Column(String, primary_key=True)
-    document_id = Column(String, ForeignKey("documents.document_id"))
+    document_id = Column(
+        String, ForeignKey("documents.document_id", ondelete="CASCADE"), index=True
+    )
     text = Column(Text)
     section = Column(String)
     page_number = Column(Integer)
-    created_at = Column(DateTime, server_default=func.now())
 
     document = relationship("Document", back_populates="text_chunks")
 
@@ -108,9 +162,11 @@ class TableDB(Base):
     __tablename__ = "tables"
 
     chunk_id = Column(String, primary_key=True)
-    document_id = Column(String, ForeignKey("documents.document_id"))
+    document_id = Column(
+        String, ForeignKey("documents.document_id", ondelete="CASCADE"), index=True
+    )
     table_html = Column(Text)
-    table_data = Column(JSON)
+    table_data = Column(JSONB)
     caption = Column(String)
     section = Column(String)
     page_number = Column(Integer)
@@ -126,6 +182,17 @@ class Fact(Base):
     """Fact model representing a financial metric definition from XBRL data."""
 
     __tablename__ = "facts"
+    __table_args__ = (
+        # Fact embeddings are stored unit-length, so inner product ranks
+        # like cosine distance without the per-row norms
+        Index(
+            "facts_embedding_ip_idx",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "halfvec_ip_ops"},
+        ),
+    )
 
     fact_id = Column(String, primary_key=True)
     label = Column(String, default="No label available")
@@ -133,34 +200,70 @@ class Fact(Base):
     taxonomy = Column(String, default="us-gaap")
     fact_type = Column(String, default="monetary")
     period_type = Column(String, nullable=True)
-    embedding = Column(
-        Vector(3072)
-    )  # Using pgvector's Vector type with OpenAI's embedding dimension
-    fact_values = relationship("FactValue", back_populates="fact")
+    # Deferred so fact lookups and search results do not load a 3072-dim
+    # vector per row; it is fetched on first access
+    embedding = deferred(
+        Column(HALFVEC(3072))
+    )  # Half-precision pgvector type with OpenAI's embedding dimension
+    fact_values = relationship("FactValue", back_populates="fact", passive_deletes=True)
 
     def __repr__(self) -> str:
         return f"<Fact(fact_id='{self.fact_id}', label='{self.label}')>"
 
 
+FACT_EMBEDDING_BITS = cast(func.binary_quantize(Fact.embedding), BIT(3072))
+
+Index(
+    "facts_embedding_bit_idx",
+    FACT_EMBEDDING_BITS.label("embedding_bits"),
+    postgresql_using="hnsw",
+    postgresql_ops={"embedding_bits": "bit_hamming_ops"},
+)
+
+
 class FactValue(Base):
     """Fact value model."""
 
     __tablename__ = "fact_values"
-    id = Column(Integer, primary_key=True)
-    fact_id = Column(String, ForeignKey("facts.fact_id"))
+    __table_args__ = (
+        # One value per fact and filing: the ON CONFLICT target for fact value
+        # upserts. Also covers fact_id lookups and the per-(fact, document)
+        # ranking in FactRepository.get_fact_values_bulk. It includes the
+        # partition key because unique indexes on partitioned tables must.
+        # Values without a document count as the same filing.
+        Index(
+            "ix_fact_values_fact_document_year",
+            "fact_id",
+            "document_id",
+            "fiscal_year",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_fact_values_ticker_year_period",
+            "ticker",
+            "fiscal_year",
+            "fiscal_period",
+        ),
+        # Range-partitioned by year; partitions are created in init_db
+        {"postgresql_partition_by": "RANGE (fiscal_year)"},
+    )
+
+    # The partition key must be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fact_id = Column(String, ForeignKey("facts.fact_id", ondelete="CASCADE"))
     ticker = Column(String, nullable=True)
     value = Column(Float, nullable=True)
-    document_id = Column(String, nullable=True)
+    document_id = Column(String, nullable=True, index=True)
     filing_type = Column(String, nullable=True)
     accession_number = Column(String, nullable=True)
     start_date = Column(String, nullable=True)
     end_date = Column(String, nullable=True)
-    fiscal_year = Column(Integer, nullable=True)
-    fiscal_period = Column(Integer, nullable=True)
+    fiscal_year = Column(Integer, primary_key=True, default=0)
+    fiscal_period = Column(SmallInteger, nullable=True)
     unit = Column(String, default="USD")
     decimals = Column(Integer, nullable=True)
     form = Column(String, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
 
     fact = relationship("Fact", back_populates="fact_values")
 
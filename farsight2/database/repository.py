@@ -1,12 +1,43 @@
-"""Repository module for database operations."""
-
-from typing import List, Dict, Any, Optional, Tuple
-
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+"""Repository module for database operations.
+
+Repository methods flush their changes but never commit; the caller owns the
+transaction and commits once per unit of work.
+"""
+
+import io
+from collections import OrderedDict
+from functools import cached_property
+from operator import attrgetter
+from threading import Lock
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import (
+    Integer,
+    event,
+    Row,
+    Select,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    lambda_stmt,
+    select,
+    text,
+    true,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from pgvector import HalfVector
+from pgvector.sqlalchemy import BIT, HALFVEC
 
 from farsight2.utils import generate_document_id
 from farsight2.database.models import (
+    EMBEDDING_BITS,
+    FACT_EMBEDDING_BITS,
     Company,
     Document,
     DocumentChunk,
@@ -28,6 +59,180 @@ from farsight2.models.models import (
     Table as TableModel,
 )
 
+# Rows fetched per round trip when streaming results from a server-side cursor
+STREAM_BATCH_SIZE = 1000
+
+# Candidates shortlisted by the binary-quantized index per requested result,
+# re-ranked by full cosine distance
+RERANK_FACTOR = 10
+
+# hnsw.ef_search bounds how many rows an HNSW scan can return
+HNSW_MIN_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+
+# Document columns needed to build DocumentMetadata
+DOCUMENT_METADATA_COLUMNS = (
+    Document.document_id,
+    Document.ticker,
+    Document.year,
+    Document.quarter,
+    Document.filing_type,
+    Document.filing_date,
+)
+
+# DocumentChunk columns needed to build the DocumentChunk model
+CHUNK_MODEL_COLUMNS = (
+    DocumentChunk.chunk_id,
+    DocumentChunk.document_id,
+    DocumentChunk.content,
+    DocumentChunk.content_type,
+    DocumentChunk.location,
+)
+
+# FactValue model fields, which are also the fact_values column names
+FACT_VALUE_FIELDS = tuple(FactValueModel.model_fields)
+
+# Columns identifying one value per fact and filing, the ON CONFLICT target
+# of fact value upserts
+FACT_VALUE_KEY = ("fact_id", "document_id", "fiscal_year")
+
+# Fiscal year stored for values without one; fiscal_year is part of the
+# primary key and the partition key, so it cannot be NULL
+UNKNOWN_FISCAL_YEAR = 0
+
+# FactValue columns needed to build the FactValue model, selected as plain
+# rows for read paths that return many values
+FACT_VALUE_MODEL_COLUMNS = tuple(getattr(FactValue, name) for name in FACT_VALUE_FIELDS)
+
+# Reads every FactValue model field from an entity or row in one call
+_fact_value_fields = attrgetter(*FACT_VALUE_FIELDS)
+
+# Fact columns returned by similarity search; the embedding is left out so
+# results do not carry a 3072-dim vector per row
+FACT_SEARCH_COLUMNS = (
+    Fact.fact_id,
+    Fact.label,
+    Fact.description,
+    Fact.taxonomy,
+    Fact.fact_type,
+    Fact.period_type,
+)
+
+# IDs bound per IN (...) query when looking up many keys
+ID_BATCH_SIZE = 1000
+
+# Rows buffered per COPY statement when bulk-loading
+COPY_BATCH_SIZE = 10000
+
+# SQLSTATE of a foreign key violation, raised when a referenced row is missing
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Escapes for COPY's text format; None is written as \N
+_COPY_TEXT_ESCAPES = str.maketrans(
+    {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+)
+
+
+def _fact_value_row(fact_value: FactValueModel) -> Dict[str, Any]:
+    """Get the column values of a fact value, with a fiscal year for its key."""
+    row = fact_value.model_dump()
+    if row["fiscal_year"] is None:
+        row["fiscal_year"] = UNKNOWN_FISCAL_YEAR
+    return row
+
+
+def _copy_text(value: Any) -> str:
+    """Format a value as a field of COPY's text format."""
+    if value is None:
+        return "\\N"
+    return str(value).translate(_COPY_TEXT_ESCAPES)
+
+
+# Query embeddings kept per (embedding model, query text), shared by all
+# repositories in the process, least recently used evicted first
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+_query_embeddings: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+_query_embeddings_lock = Lock()
+
+
+# Session.info key of the document IDs confirmed to exist in the session's
+# current transaction, so bulk loads check each document once; the set is
+# dropped when the transaction ends, as a rollback or another process may
+# remove the documents afterwards
+KNOWN_DOCUMENT_IDS_KEY = "known_document_ids"
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_known_documents(session: Session, transaction: Any) -> None:
+    """Drop the document IDs confirmed in a transaction once it ends."""
+    session.info.pop(KNOWN_DOCUMENT_IDS_KEY, None)
+
+
+def _halfvec(
+    embedding: Optional[Union[List[float], np.ndarray]],
+) -> Optional[HalfVector]:
+    """Convert an embedding to half precision once, for reuse in several binds."""
+    if embedding is None:
+        return None
+    return HalfVector(np.asarray(embedding, dtype=np.float32))
+
+
+def _binary_quantized(query_embedding: Union[List[float], HalfVector]) -> Any:
+    """Build the bit(3072) expression matching the binary-quantized indexes."""
+    return cast(func.binary_quantize(cast(query_embedding, HALFVEC(3072))), BIT(3072))
+
+
+def _unit_vector(
+    embedding: Optional[Union[List[float], np.ndarray]],
+) -> Optional[np.ndarray]:
+    """Scale an embedding to unit length, or None if it has no direction."""
+    if embedding is None or not len(embedding):
+        return None
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+def _set_ef_search(db: Session, candidate_count: int) -> None:
+    """Let HNSW scans in the current transaction return the candidate count."""
+    ef_search = min(max(candidate_count, HNSW_MIN_EF_SEARCH), HNSW_MAX_EF_SEARCH)
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+
+
+def _set_iterative_scan(db: Session) -> None:
+    """Let filtered HNSW scans in the current transaction keep scanning until
+    enough rows pass the filters, instead of returning fewer results."""
+    db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+
+
+def _embed_query(embedding_service: Any, query: str) -> List[float]:
+    """Generate a query embedding, reusing a cached one for repeated queries.
+
+    Zero vectors (the embedding service's fallback on errors) are not cached.
+
+    Args:
+        embedding_service: Service to generate embeddings
+        query: Query text
+
+    Returns:
+        Query embedding
+    """
+    key = (getattr(embedding_service, "embedding_model", "default"), query)
+    with _query_embeddings_lock:
+        if (embedding := _query_embeddings.get(key)) is not None:
+            _query_embeddings.move_to_end(key)
+            return embedding
+
+    embedding = embedding_service.generate_embedding(query)
+    if any(embedding):
+        with _query_embeddings_lock:
+            _query_embeddings[key] = embedding
+            if len(_query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                _query_embeddings.popitem(last=False)
+    return embedding
+
 
 class CompanyRepository:
     """Repository for company operations."""
@@ -50,22 +255,23 @@ class CompanyRepository:
         Returns:
             Created company
         """
-        company = Company(ticker=ticker, name=name)
-        self.db.add(company)
-        self.db.commit()
-        self.db.refresh(company)
-        return company
+        return self.db.scalar(
+            insert(Company).values(ticker=ticker, name=name).returning(Company)
+        )
 
     def get_company(self, ticker: str) -> Optional[Company]:
         """Get a company by ticker.
 
+        Companies already loaded in this session are returned from its
+        identity map without a query.
+
         Args:
             ticker: Company ticker
 
         Returns:
             Company if found, None otherwise
         """
-        return self.db.query(Company).filter(Company.ticker == ticker).first()
+        return self.db.get(Company, ticker)
 
     def get_or_create_company(self, ticker: str, name: Optional[str] = None) -> Company:
         """Get a company by ticker or create it if it doesn't exist.
@@ -77,10 +283,26 @@ class CompanyRepository:
         Returns:
             Company
         """
-        company = self.get_company(ticker)
-        if not company:
-            company = self.create_company(ticker, name)
-        return company
+        # Insert atomically; an existing row yields nothing and is fetched
+        return self.db.scalar(
+            pg_insert(Company)
+            .values(ticker=ticker, name=name)
+            .on_conflict_do_nothing(index_elements=[Company.ticker])
+            .returning(Company)
+        ) or self.get_company(ticker)
+
+    def ensure_company(self, ticker: str, name: Optional[str] = None) -> None:
+        """Create a company unless it already exists, without loading it.
+
+        Args:
+            ticker: Company ticker
+            name: Company name
+        """
+        self.db.execute(
+            pg_insert(Company)
+            .values(ticker=ticker, name=name)
+            .on_conflict_do_nothing(index_elements=[Company.ticker])
+        )
 
     def get_all_companies(self) -> List[Company]:
         """Get all companies.
@@ -90,6 +312,19 @@ class CompanyRepository:
         """
         return self.db.query(Company).all()
 
+    def iter_all(self, chunk_size: int = STREAM_BATCH_SIZE) -> Iterator[Company]:
+        """Iterate over all companies with a server-side cursor.
+
+        Args:
+            chunk_size: Number of companies fetched per round trip
+
+        Returns:
+            Iterator of companies
+        """
+        yield from self.db.scalars(
+            select(Company).execution_options(yield_per=chunk_size)
+        )
+
     def to_model(self, company: Company) -> CompanyModel:
         """Convert a company entity to a model.
 
@@ -105,13 +340,22 @@ class CompanyRepository:
 class DocumentRepository:
     """Repository for document operations."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, company_repo: Optional["CompanyRepository"] = None):
         """Initialize the repository.
 
         Args:
             db: Database session
+            company_repo: Company repository to share; one is created on first use
+                if not given
         """
         self.db = db
+        if company_repo is not None:
+            self._companies = company_repo
+
+    @cached_property
+    def _companies(self) -> "CompanyRepository":
+        """Company repository sharing this session."""
+        return CompanyRepository(self.db)
 
     def create_document(self, document_metadata: DocumentMetadata) -> Document:
         """Create a document.
@@ -122,40 +366,103 @@ class DocumentRepository:
         Returns:
             Created document
         """
-
-        if document := self.get_document(document_metadata.document_id):
-            return document
-        # Ensure the company exists
-        company_repo = CompanyRepository(self.db)
-        company_repo.get_or_create_company(document_metadata.ticker)
-
-        # Create the document
-        document = Document(
-            document_id=document_metadata.document_id,
-            ticker=document_metadata.ticker,
-            year=document_metadata.year,
-            quarter=document_metadata.quarter,
-            filing_type=document_metadata.filing_type,
-            filing_date=document_metadata.filing_date,
-        )
-        self.db.add(document)
-        self.db.commit()
-        self.db.refresh(document)
-        return document
+        # Ensure the company exists in the same transaction as the document
+        self._companies.ensure_company(document_metadata.ticker)
+
+        # Create the document, returning the existing one if already stored
+        return self.db.scalar(
+            pg_insert(Document)
+            .values(
+                document_id=document_metadata.document_id,
+                ticker=document_metadata.ticker,
+                year=document_metadata.year,
+                quarter=document_metadata.quarter,
+                filing_type=document_metadata.filing_type,
+                filing_date=document_metadata.filing_date,
+            )
+            .on_conflict_do_nothing(index_elements=[Document.document_id])
+            .returning(Document)
+        ) or self.get_document(document_metadata.document_id)
 
     def get_document(self, document_id: str) -> Optional[Document]:
         """Get a document by ID.
 
+        Documents already loaded or created in this session are returned from
+        its identity map without a query.
+
         Args:
             document_id: Document ID
 
         Returns:
             Document if found, None otherwise
         """
+        return self.db.get(Document, document_id)
+
+    def get_documents_by_ids(self, document_ids: Iterable[str]) -> List[Document]:
+        """Get documents by ID in a single query.
+
+        Args:
+            document_ids: Document IDs
+
+        Returns:
+            List of the documents found, in no particular order
+        """
+        document_ids = set(document_ids)
+        if not document_ids:
+            return []
         return (
-            self.db.query(Document).filter(Document.document_id == document_id).first()
+            self.db.query(Document).filter(Document.document_id.in_(document_ids)).all()
         )
 
+    def require_documents(self, document_ids: Iterable[str]) -> None:
+        """Check that documents exist with a single query.
+
+        Args:
+            document_ids: Document IDs that must exist
+
+        Raises:
+            ValueError: If any of the documents is not found
+        """
+        # Documents held by the session or seen earlier in the transaction
+        # are known to exist
+        known = self.db.info.setdefault(KNOWN_DOCUMENT_IDS_KEY, set())
+        document_ids = {
+            document_id
+            for document_id in document_ids
+            if document_id not in known
+            and self.db.identity_key(Document, document_id) not in self.db.identity_map
+        }
+        if not document_ids:
+            return
+        found = set(
+            self.db.scalars(
+                select(Document.document_id).where(
+                    Document.document_id.in_(document_ids)
+                )
+            )
+        )
+        known.update(found)
+        if missing := document_ids - found:
+            raise ValueError(f"Document not found: {', '.join(sorted(missing))}")
+
+    def delete_document(self, document_id: str) -> bool:
+        """Delete a document in one statement without committing.
+
+        Its chunks, chunk embeddings, text chunks and tables are removed by the
+        foreign keys' ON DELETE CASCADE rather than loaded and deleted here.
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            True if the document was deleted, False if it was not found
+        """
+        self.db.info.get(KNOWN_DOCUMENT_IDS_KEY, set()).discard(document_id)
+        result = self.db.execute(
+            delete(Document).where(Document.document_id == document_id)
+        )
+        return bool(result.rowcount)
+
     def get_documents_by_ticker(self, ticker: str) -> List[Document]:
         """Get documents by ticker.
 
@@ -207,6 +514,29 @@ class DocumentRepository:
 
         return query.all()
 
+    def get_document_row(
+        self, ticker: str, year: int, quarter: Optional[int], filing_type: str
+    ) -> Optional[Row]:
+        """Get the metadata columns of a document matching the filing criteria.
+
+        Args:
+            ticker: Company ticker
+            year: Filing year
+            quarter: Filing quarter, or None to match any quarter
+            filing_type: Filing type
+
+        Returns:
+            Row with the DocumentMetadata fields if found, None otherwise
+        """
+        query = select(*DOCUMENT_METADATA_COLUMNS).where(
+            Document.ticker == ticker,
+            Document.year == year,
+            Document.filing_type == filing_type,
+        )
+        if quarter is not None:
+            query = query.where(Document.quarter == quarter)
+        return self.db.execute(query.limit(1)).first()
+
     def get_all_documents(self) -> List[Document]:
         """Get all documents.
 
@@ -215,6 +545,74 @@ class DocumentRepository:
         """
         return self.db.query(Document).all()
 
+    def iter_all(self, chunk_size: int = STREAM_BATCH_SIZE) -> Iterator[Document]:
+        """Iterate over all documents with a server-side cursor.
+
+        Args:
+            chunk_size: Number of documents fetched per round trip
+
+        Returns:
+            Iterator of documents
+        """
+        yield from self.db.scalars(
+            select(Document).execution_options(yield_per=chunk_size)
+        )
+
+    def get_documents_grouped_by_ticker(
+        self, tickers: Iterable[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the documents of several companies grouped by ticker in one query.
+
+        Postgres aggregates each company's documents into a JSON array, so one
+        row per company is returned.
+
+        Args:
+            tickers: Company tickers
+
+        Returns:
+            Mapping of ticker to its documents' metadata fields
+        """
+        tickers = set(tickers)
+        if not tickers:
+            return {}
+        documents = func.jsonb_agg(
+            func.jsonb_build_object(
+                *(
+                    part
+                    for column in DOCUMENT_METADATA_COLUMNS
+                    for part in (column.key, column)
+                )
+            )
+        )
+        rows = self.db.execute(
+            select(Document.ticker, documents)
+            .where(Document.ticker.in_(tickers))
+            .group_by(Document.ticker)
+        )
+        return dict(rows.tuples())
+
+    def stream_document_rows(
+        self, ticker: Optional[str] = None, limit: Optional[int] = None
+    ) -> Iterator[Row]:
+        """Stream document metadata columns with a server-side cursor.
+
+        Only the metadata columns are selected and no ORM entities are built,
+        so memory stays flat regardless of the number of documents.
+
+        Args:
+            ticker: Optional company ticker to filter by
+            limit: Optional maximum number of documents
+
+        Returns:
+            Iterator of rows with the DocumentMetadata fields
+        """
+        query = select(*DOCUMENT_METADATA_COLUMNS)
+        if ticker is not None:
+            query = query.where(Document.ticker == ticker)
+        if limit is not None:
+            query = query.limit(limit)
+        return self.db.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+
     def to_model(self, document: Document) -> DocumentMetadata:
         """Convert a document entity to a model.
 
@@ -237,13 +635,24 @@ class DocumentRepository:
 class ChunkRepository:
     """Repository for document chunk operations."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self, db: Session, document_repo: Optional["DocumentRepository"] = None
+    ):
         """Initialize the repository.
 
         Args:
             db: Database session
+            document_repo: Document repository to share; one is created on first use
+                if not given
         """
         self.db = db
+        if document_repo is not None:
+            self._documents = document_repo
+
+    @cached_property
+    def _documents(self) -> "DocumentRepository":
+        """Document repository sharing this session."""
+        return DocumentRepository(self.db)
 
     def create_chunk(self, chunk: DocumentChunkModel) -> DocumentChunk:
         """Create a document chunk.
@@ -255,23 +664,61 @@ class ChunkRepository:
             Created document chunk
         """
         # Ensure the document exists
-        document_repo = DocumentRepository(self.db)
-        document = document_repo.get_document(chunk.document_id)
-        if not document:
-            raise ValueError(f"Document not found: {chunk.document_id}")
+        self._documents.require_documents([chunk.document_id])
 
         # Create the chunk
-        db_chunk = DocumentChunk(
-            chunk_id=chunk.chunk_id,
-            document_id=chunk.document_id,
-            content=chunk.content,
-            content_type=chunk.content_type,
-            location=chunk.location,
+        return self.db.scalar(
+            insert(DocumentChunk)
+            .values(
+                chunk_id=chunk.chunk_id,
+                document_id=chunk.document_id,
+                content=chunk.content,
+                content_type=chunk.content_type,
+                location=chunk.location,
+            )
+            .returning(DocumentChunk)
         )
-        self.db.add(db_chunk)
-        self.db.commit()
-        self.db.refresh(db_chunk)
-        return db_chunk
+
+    def create_chunks(
+        self, chunks: List[DocumentChunkModel], skip_existing: bool = False
+    ) -> None:
+        """Insert document chunks in a single executemany without committing.
+
+        Args:
+            chunks: Document chunk models
+            skip_existing: Whether to ignore chunks whose ID already exists; the
+                document check is then left to the foreign key, whose
+                violation is reported as the same ValueError
+
+        Raises:
+            ValueError: If a referenced document is not found
+        """
+        if not chunks:
+            return
+        statement = pg_insert(DocumentChunk)
+        if skip_existing:
+            statement = statement.on_conflict_do_nothing(index_elements=["chunk_id"])
+        else:
+            self._documents.require_documents(chunk.document_id for chunk in chunks)
+        try:
+            self.db.execute(
+                statement,
+                [
+                    {
+                        "chunk_id": chunk.chunk_id,
+                        "document_id": chunk.document_id,
+                        "content": chunk.content,
+                        "content_type": chunk.content_type,
+                        "location": chunk.location,
+                    }
+                    for chunk in chunks
+                ],
+            )
+        except IntegrityError as e:
+            if getattr(e.orig, "pgcode", None) != FOREIGN_KEY_VIOLATION:
+                raise
+            document_ids = sorted({chunk.document_id for chunk in chunks})
+            raise ValueError(f"Document not found: {', '.join(document_ids)}") from e
 
     def get_chunk(self, chunk_id: str) -> Optional[DocumentChunk]:
         """Get a document chunk by ID.
@@ -282,25 +729,73 @@ class ChunkRepository:
         Returns:
             Document chunk if found, None otherwise
         """
+        return self.db.get(DocumentChunk, chunk_id)
+
+    def get_chunks_by_ids(self, chunk_ids: List[str]) -> List[DocumentChunk]:
+        """Get document chunks by ID in a single query.
+
+        Args:
+            chunk_ids: Chunk IDs
+
+        Returns:
+            List of the document chunks found, in no particular order
+        """
+        if not chunk_ids:
+            return []
         return (
             self.db.query(DocumentChunk)
-            .filter(DocumentChunk.chunk_id == chunk_id)
-            .first()
+            .filter(DocumentChunk.chunk_id.in_(chunk_ids))
+            .all()
         )
 
-    def get_chunks_by_document(self, document_id: str) -> List[DocumentChunk]:
+    def get_chunk_rows_by_ids(self, chunk_ids: List[str]) -> List[Row]:
+        """Get the model columns of document chunks by ID in a single query.
+
+        Args:
+            chunk_ids: Chunk IDs
+
+        Returns:
+            List of rows with the DocumentChunk model fields, in no particular
+            order
+        """
+        if not chunk_ids:
+            return []
+        return self.db.execute(
+            select(*CHUNK_MODEL_COLUMNS).where(DocumentChunk.chunk_id.in_(chunk_ids))
+        ).all()
+
+    def get_chunks_by_document(
+        self, document_id: str, load_embeddings: bool = False
+    ) -> List[DocumentChunk]:
         """Get document chunks by document ID.
 
         Args:
             document_id: Document ID
+            load_embeddings: Whether to load the chunk embeddings in one extra query
 
         Returns:
             List of document chunks
         """
-        return (
-            self.db.query(DocumentChunk)
-            .filter(DocumentChunk.document_id == document_id)
-            .all()
+        query = self.db.query(DocumentChunk).filter(
+            DocumentChunk.document_id == document_id
+        )
+        if load_embeddings:
+            query = query.options(selectinload(DocumentChunk.embedding))
+        return query.all()
+
+    def stream_chunk_rows(self, document_id: str) -> Iterator[Row]:
+        """Stream a document's chunk columns with a server-side cursor.
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            Iterator of rows with the DocumentChunk model fields
+        """
+        return self.db.execute(
+            select(*CHUNK_MODEL_COLUMNS)
+            .where(DocumentChunk.document_id == document_id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
         )
 
     def to_model(self, chunk: DocumentChunk) -> DocumentChunkModel:
@@ -324,38 +819,134 @@ class ChunkRepository:
 class EmbeddingRepository:
     """Repository for embedding operations."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, chunk_repo: Optional["ChunkRepository"] = None):
         """Initialize the repository.
 
         Args:
             db: Database session
+            chunk_repo: Chunk repository to share; one is created on first use
+                if not given
         """
         self.db = db
+        if chunk_repo is not None:
+            self._chunks = chunk_repo
+
+    @cached_property
+    def _chunks(self) -> "ChunkRepository":
+        """Chunk repository sharing this session."""
+        return ChunkRepository(self.db)
 
     def create_embedding(self, embedded_chunk: EmbeddedChunk) -> ChunkEmbedding:
-        """Create a chunk embedding.
+        """Create a chunk embedding, replacing any stored for the same chunk.
 
         Args:
             embedded_chunk: Embedded chunk
 
         Returns:
-            Created chunk embedding
+            Created or updated chunk embedding
+
+        Raises:
+            ValueError: If the chunk's document is not found
         """
-        # Ensure the chunk exists
-        chunk_repo = ChunkRepository(self.db)
-        chunk = chunk_repo.get_chunk(embedded_chunk.chunk.chunk_id)
-        if not chunk:
-            # Create the chunk
-            chunk = chunk_repo.create_chunk(embedded_chunk.chunk)
+        # Create the chunk unless it already exists, without a lookup first
+        self._chunks.create_chunks([embedded_chunk.chunk], skip_existing=True)
+
+        # Create or replace the embedding; pgvector converts float32 arrays
+        # without going through a Python float per element
+        statement = pg_insert(ChunkEmbedding).values(
+            chunk_id=embedded_chunk.chunk.chunk_id,
+            embedding=np.ascontiguousarray(embedded_chunk.embedding, dtype=np.float32),
+        )
+        return self.db.scalar(
+            statement.on_conflict_do_update(
+                index_elements=[ChunkEmbedding.chunk_id],
+                set_={"embedding": statement.excluded.embedding},
+            ).returning(ChunkEmbedding)
+        )
+
+    def create_embeddings(self, embedded_chunks: List[EmbeddedChunk]) -> None:
+        """Insert embedded chunks with one executemany per table without committing.
 
-        # Create the embedding
-        embedding = ChunkEmbedding(
-            chunk_id=chunk.chunk_id, embedding=embedded_chunk.embedding
+        Chunks that already exist are kept as they are; their embeddings are
+        replaced.
+
+        Args:
+            embedded_chunks: Embedded chunks
+
+        Raises:
+            ValueError: If a chunk's document is not found
+        """
+        # A multi-row upsert cannot touch the same row twice; keep the last
+        embedded_chunks = list(
+            {
+                embedded_chunk.chunk.chunk_id: embedded_chunk
+                for embedded_chunk in embedded_chunks
+            }.values()
+        )
+        if not embedded_chunks:
+            return
+        self._chunks.create_chunks(
+            [embedded_chunk.chunk for embedded_chunk in embedded_chunks],
+            skip_existing=True,
+        )
+        # One (N, D) matrix; each row is passed as a view into it
+        matrix = np.asarray(
+            [embedded_chunk.embedding for embedded_chunk in embedded_chunks],
+            dtype=np.float32,
+        )
+        statement = pg_insert(ChunkEmbedding)
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ChunkEmbedding.chunk_id],
+                set_={"embedding": statement.excluded.embedding},
+            ),
+            [
+                {"chunk_id": embedded_chunk.chunk.chunk_id, "embedding": embedding}
+                for embedded_chunk, embedding in zip(embedded_chunks, matrix)
+            ],
         )
-        self.db.add(embedding)
-        self.db.commit()
-        self.db.refresh(embedding)
-        return embedding
+
+    def copy_embeddings(
+        self, embeddings: List[Tuple[str, Union[List[float], np.ndarray]]]
+    ) -> None:
+        """Bulk-load chunk embeddings with COPY without committing.
+
+        The rows are streamed in one round trip into a temporary table inside
+        the session's current transaction and merged from there, so chunks
+        that already have an embedding get the new one instead of failing on
+        the unique chunk_id. If a chunk appears more than once, one of its
+        embeddings is kept.
+
+        Args:
+            embeddings: List of (chunk_id, embedding) tuples
+        """
+        if not embeddings:
+            return
+        buffer = io.StringIO()
+        for chunk_id, embedding in embeddings:
+            vector = ",".join(map(str, embedding))
+            buffer.write(f"{_copy_text(chunk_id)}\t[{vector}]\n")
+        buffer.seek(0)
+
+        self.db.execute(
+            text(
+                "CREATE TEMP TABLE chunk_embeddings_load "
+                "(chunk_id text, embedding halfvec(3072)) ON COMMIT DROP"
+            )
+        )
+        cursor = self.db.connection().connection.cursor()
+        cursor.copy_expert(
+            "COPY chunk_embeddings_load (chunk_id, embedding) FROM STDIN", buffer
+        )
+        self.db.execute(
+            text(
+                "INSERT INTO chunk_embeddings (chunk_id, embedding) "
+                "SELECT DISTINCT ON (chunk_id) chunk_id, embedding "
+                "FROM chunk_embeddings_load "
+                "ON CONFLICT (chunk_id) DO UPDATE SET embedding = excluded.embedding"
+            )
+        )
+        self.db.execute(text("DROP TABLE chunk_embeddings_load"))
 
     def get_embedding(self, chunk_id: str) -> Optional[ChunkEmbedding]:
         """Get a chunk embedding by chunk ID.
@@ -366,55 +957,185 @@ class EmbeddingRepository:
         Returns:
             Chunk embedding if found, None otherwise
         """
-        return (
-            self.db.query(ChunkEmbedding)
-            .filter(ChunkEmbedding.chunk_id == chunk_id)
-            .first()
-        )
+        return self.db.scalars(
+            lambda_stmt(
+                lambda: select(ChunkEmbedding).where(
+                    ChunkEmbedding.chunk_id == chunk_id
+                )
+            )
+        ).first()
 
     def search_embeddings(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         top_k: int = 5,
         filter_dict: Optional[Dict[str, Any]] = None,
-    ) -> List[Tuple[DocumentChunk, float]]:
+    ) -> List[Tuple[Row, float]]:
         """Search for the most similar chunks to a query embedding.
 
+        Chunk columns are selected as plain rows; no ORM entities are built
+        for this read-only query.
+
+        Args:
+            query_embedding: Query embedding
+            top_k: Number of results to return
+            filter_dict: Dictionary of filters to apply
+
+        Returns:
+            List of tuples containing rows with the DocumentChunk model fields
+            and their similarity scores
+        """
+        results = self._run_similarity_query(
+            CHUNK_MODEL_COLUMNS, query_embedding, top_k, filter_dict
+        )
+
+        # Convert distances to similarities
+        return [(row, 1.0 - float(row.distance)) for row in results]
+
+    def search_chunk_ids(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, str, str, float]]:
+        """Search for the most similar chunks without loading their content.
+
+        Use ChunkRepository.get_chunk_rows_by_ids to load the chunks that are
+        still needed after reranking or filtering.
+
         Args:
             query_embedding: Query embedding
             top_k: Number of results to return
             filter_dict: Dictionary of filters to apply
 
         Returns:
-            List of tuples containing document chunks and their similarity scores
+            List of (chunk_id, document_id, content_type, similarity) tuples
         """
-        # Convert query embedding to array for pgvector
-        query_vector = query_embedding
+        results = self._run_similarity_query(
+            (
+                DocumentChunk.chunk_id,
+                DocumentChunk.document_id,
+                DocumentChunk.content_type,
+            ),
+            query_embedding,
+            top_k,
+            filter_dict,
+        )
+        return [
+            (chunk_id, document_id, content_type, 1.0 - float(distance))
+            for chunk_id, document_id, content_type, distance in results
+        ]
+
+    def _run_similarity_query(
+        self,
+        columns: Tuple[Any, ...],
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]],
+    ) -> List[Row]:
+        """Set the HNSW scan options for a similarity query and run it.
 
-        # Start with a base query using pgvector's cosine_distance
-        query = self.db.query(
-            DocumentChunk,
-            (1 - ChunkEmbedding.embedding.cosine_distance(query_vector)).label(
-                "similarity"
-            ),  # Convert distance to similarity
-        ).join(ChunkEmbedding, DocumentChunk.chunk_id == ChunkEmbedding.chunk_id)
+        The options are SET LOCAL, so they last until the current
+        transaction ends.
 
-        # Apply filters if provided
+        Args:
+            columns: Entities or columns to select before the distance
+            query_embedding: Query embedding
+            top_k: Number of results to return
+            filter_dict: Dictionary of filters to apply
+
+        Returns:
+            Rows of the columns followed by the cosine distance, nearest first
+        """
         if filter_dict:
-            if "document_id" in filter_dict:
-                query = query.filter(
-                    DocumentChunk.document_id == filter_dict["document_id"]
-                )
-            if "content_type" in filter_dict:
-                query = query.filter(
-                    DocumentChunk.content_type == filter_dict["content_type"]
-                )
+            _set_iterative_scan(self.db)
+        else:
+            _set_ef_search(self.db, top_k * RERANK_FACTOR)
+        return self.db.execute(
+            self._similarity_query(columns, query_embedding, top_k, filter_dict)
+        ).all()
+
+    def _similarity_query(
+        self,
+        columns: Tuple[Any, ...],
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int,
+        filter_dict: Optional[Dict[str, Any]],
+    ) -> Select:
+        """Build a top-k similarity query selecting the given chunk columns.
+
+        Args:
+            columns: Entities or columns to select before the distance
+            query_embedding: Query embedding
+            top_k: Number of results to return
+            filter_dict: Dictionary of filters to apply
 
-        # Order by similarity (descending) and limit to top_k
-        results = query.order_by(text("similarity DESC")).limit(top_k).all()
+        Returns:
+            Select yielding the columns followed by the cosine distance
+        """
+        # Both the shortlist and the rerank bind the same converted vector
+        query_embedding = _halfvec(query_embedding)
+        if not filter_dict:
+            return self._reranked_similarity_query(columns, query_embedding, top_k)
+
+        # Start with a base query using pgvector's cosine distance operator (<=>)
+        distance = ChunkEmbedding.embedding.cosine_distance(query_embedding)
+        query = select(*columns, distance.label("distance")).join(
+            ChunkEmbedding, DocumentChunk.chunk_id == ChunkEmbedding.chunk_id
+        )
+
+        # Filters are applied after the HNSW scan, which needs iterative
+        # scanning to still return top_k rows; see _run_similarity_query
+        if "document_id" in filter_dict:
+            query = query.where(DocumentChunk.document_id == filter_dict["document_id"])
+        if "content_type" in filter_dict:
+            query = query.where(
+                DocumentChunk.content_type == filter_dict["content_type"]
+            )
 
-        # Convert to list of tuples
-        return [(chunk, float(similarity)) for chunk, similarity in results]
+        # Order by the raw distance so Postgres can serve the top_k from a
+        # vector index instead of sorting a derived similarity column
+        return query.order_by(distance).limit(top_k)
+
+    def _reranked_similarity_query(
+        self,
+        columns: Tuple[Any, ...],
+        query_embedding: HalfVector,
+        top_k: int,
+    ) -> Select:
+        """Build a two-stage top-k similarity query.
+
+        Candidates are shortlisted by Hamming distance on the binary-quantized
+        embedding index, then re-ranked by cosine distance on the stored
+        halfvec embeddings.
+
+        Args:
+            columns: Entities or columns to select before the distance
+            query_embedding: Query embedding
+            top_k: Number of results to return
+
+        Returns:
+            Select yielding the columns followed by the cosine distance
+        """
+        # The HNSW scan must return all candidates; see _run_similarity_query
+        candidate_count = top_k * RERANK_FACTOR
+
+        candidates = (
+            select(ChunkEmbedding.chunk_id, ChunkEmbedding.embedding)
+            .order_by(
+                EMBEDDING_BITS.hamming_distance(_binary_quantized(query_embedding))
+            )
+            .limit(candidate_count)
+            .subquery()
+        )
+
+        distance = candidates.c.embedding.cosine_distance(query_embedding)
+        return (
+            select(*columns, distance.label("distance"))
+            .join(candidates, DocumentChunk.chunk_id == candidates.c.chunk_id)
+            .order_by(distance)
+            .limit(top_k)
+        )
 
     def to_model(
         self, chunk: DocumentChunk, embedding: ChunkEmbedding
@@ -428,22 +1149,39 @@ class EmbeddingRepository:
         Returns:
             Embedded chunk model
         """
-        chunk_repo = ChunkRepository(self.db)
         return EmbeddedChunk(
-            chunk=chunk_repo.to_model(chunk), embedding=embedding.embedding
+            chunk=DocumentChunkModel(
+                chunk_id=chunk.chunk_id,
+                document_id=chunk.document_id,
+                content=chunk.content,
+                content_type=chunk.content_type,
+                location=chunk.location,
+            ),
+            embedding=embedding.embedding.to_list(),
         )
 
 
 class TextChunkRepository:
     """Repository for text chunk operations."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self, db: Session, document_repo: Optional["DocumentRepository"] = None
+    ):
         """Initialize the repository.
 
         Args:
             db: Database session
+            document_repo: Document repository to share; one is created on first use
+                if not given
         """
         self.db = db
+        if document_repo is not None:
+            self._documents = document_repo
+
+    @cached_property
+    def _documents(self) -> "DocumentRepository":
+        """Document repository sharing this session."""
+        return DocumentRepository(self.db)
 
     def create_text_chunk(self, text_chunk: TextChunkModel) -> TextChunkDB:
         """Create a text chunk.
@@ -455,23 +1193,51 @@ class TextChunkRepository:
             Created text chunk
         """
         # Ensure the document exists
-        document_repo = DocumentRepository(self.db)
-        document = document_repo.get_document(text_chunk.document_id)
-        if not document:
-            raise ValueError(f"Document not found: {text_chunk.document_id}")
+        self._documents.require_documents([text_chunk.document_id])
 
         # Create the text chunk
-        db_text_chunk = TextChunkDB(
-            chunk_id=text_chunk.chunk_id,
-            document_id=text_chunk.document_id,
-            text=" ".join(text_chunk.text.split()),
-            section=text_chunk.section,
-            page_number=text_chunk.page_number,
+        return self.db.scalar(
+            insert(TextChunkDB)
+            .values(
+                chunk_id=text_chunk.chunk_id,
+                document_id=text_chunk.document_id,
+                text=text_chunk.text,
+                section=text_chunk.section,
+                page_number=text_chunk.page_number,
+            )
+            .returning(TextChunkDB)
+        )
+
+    def create_text_chunks(self, text_chunks: List[TextChunkModel]) -> None:
+        """Insert text chunks in a single executemany without committing.
+
+        Text is stored as given; DocumentProcessor normalizes whitespace when
+        it creates the chunks.
+
+        Args:
+            text_chunks: Text chunk models
+
+        Raises:
+            ValueError: If a referenced document is not found
+        """
+        if not text_chunks:
+            return
+        self._documents.require_documents(
+            text_chunk.document_id for text_chunk in text_chunks
+        )
+        self.db.execute(
+            insert(TextChunkDB),
+            [
+                {
+                    "chunk_id": text_chunk.chunk_id,
+                    "document_id": text_chunk.document_id,
+                    "text": text_chunk.text,
+                    "section": text_chunk.section,
+                    "page_number": text_chunk.page_number,
+                }
+                for text_chunk in text_chunks
+            ],
         )
-        self.db.add(db_text_chunk)
-        self.db.commit()
-        self.db.refresh(db_text_chunk)
-        return db_text_chunk
 
     def get_text_chunk(self, chunk_id: str) -> Optional[TextChunkDB]:
         """Get a text chunk by ID.
@@ -482,9 +1248,7 @@ class TextChunkRepository:
         Returns:
             Text chunk if found, None otherwise
         """
-        return (
-            self.db.query(TextChunkDB).filter(TextChunkDB.chunk_id == chunk_id).first()
-        )
+        return self.db.get(TextChunkDB, chunk_id)
 
     def get_text_chunks_by_document(self, document_id: str) -> List[TextChunkDB]:
         """Get text chunks by document ID.
@@ -522,13 +1286,24 @@ class TextChunkRepository:
 class TableRepository:
     """Repository for table operations."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self, db: Session, document_repo: Optional["DocumentRepository"] = None
+    ):
         """Initialize the repository.
 
         Args:
             db: Database session
+            document_repo: Document repository to share; one is created on first use
+                if not given
         """
         self.db = db
+        if document_repo is not None:
+            self._documents = document_repo
+
+    @cached_property
+    def _documents(self) -> "DocumentRepository":
+        """Document repository sharing this session."""
+        return DocumentRepository(self.db)
 
     def create_table(self, table: TableModel) -> TableDB:
         """Create a table.
@@ -540,25 +1315,50 @@ class TableRepository:
             Created table
         """
         # Ensure the document exists
-        document_repo = DocumentRepository(self.db)
-        document = document_repo.get_document(table.document_id)
-        if not document:
-            raise ValueError(f"Document not found: {table.document_id}")
+        self._documents.require_documents([table.document_id])
 
         # Create the table
-        db_table = TableDB(
-            chunk_id=table.chunk_id,
-            document_id=table.document_id,
-            table_html=table.table_html,
-            table_data=table.table_data,
-            caption=table.caption,
-            section=table.section,
-            page_number=table.page_number,
+        return self.db.scalar(
+            insert(TableDB)
+            .values(
+                chunk_id=table.chunk_id,
+                document_id=table.document_id,
+                table_html=table.table_html,
+                table_data=table.table_data,
+                caption=table.caption,
+                section=table.section,
+                page_number=table.page_number,
+            )
+            .returning(TableDB)
+        )
+
+    def create_tables(self, tables: List[TableModel]) -> None:
+        """Insert tables in a single executemany without committing.
+
+        Args:
+            tables: Table models
+
+        Raises:
+            ValueError: If a referenced document is not found
+        """
+        if not tables:
+            return
+        self._documents.require_documents(table.document_id for table in tables)
+        self.db.execute(
+            insert(TableDB),
+            [
+                {
+                    "chunk_id": table.chunk_id,
+                    "document_id": table.document_id,
+                    "table_html": table.table_html,
+                    "table_data": table.table_data,
+                    "caption": table.caption,
+                    "section": table.section,
+                    "page_number": table.page_number,
+                }
+                for table in tables
+            ],
         )
-        self.db.add(db_table)
-        self.db.commit()
-        self.db.refresh(db_table)
-        return db_table
 
     def get_table(self, chunk_id: str) -> Optional[TableDB]:
         """Get a table by ID.
@@ -569,7 +1369,7 @@ class TableRepository:
         Returns:
             Table if found, None otherwise
         """
-        return self.db.query(TableDB).filter(TableDB.chunk_id == chunk_id).first()
+        return self.db.get(TableDB, chunk_id)
 
     def get_tables_by_document(self, document_id: str) -> List[TableDB]:
         """Get tables by document ID.
@@ -612,7 +1412,11 @@ class FactRepository:
             db: Database session
         """
         self.db = db
-        self.embedding_service = UnifiedEmbeddingService()
+
+    @cached_property
+    def embedding_service(self) -> UnifiedEmbeddingService:
+        """Embedding service, created only when a fact needs embedding."""
+        return UnifiedEmbeddingService()
 
     def create_fact(self, fact: FactModel) -> Fact:
         """Create a fact.
@@ -625,19 +1429,85 @@ class FactRepository:
         """
         if not fact.embedding:
             fact.embedding = self.embedding_service.embed_fact(fact)
-        db_fact = Fact(
-            fact_id=fact.fact_id,
-            label=fact.label,
-            description=fact.description,
-            taxonomy=fact.taxonomy,
-            fact_type=fact.fact_type,
-            period_type=fact.period_type,
-            embedding=fact.embedding if fact.embedding else None,
+        return self.db.scalar(
+            insert(Fact)
+            .values(
+                fact_id=fact.fact_id,
+                label=fact.label,
+                description=fact.description,
+                taxonomy=fact.taxonomy,
+                fact_type=fact.fact_type,
+                period_type=fact.period_type,
+                embedding=_unit_vector(fact.embedding),
+            )
+            .returning(Fact)
         )
-        self.db.add(db_fact)
-        self.db.commit()
-        self.db.refresh(db_fact)
-        return db_fact
+
+    def create_facts(self, facts: List[FactModel]) -> None:
+        """Insert or update embedded facts in a single executemany without committing.
+
+        Facts that already exist get the given definition and embedding.
+
+        Args:
+            facts: Fact models with their embeddings
+        """
+        # A multi-row upsert cannot touch the same row twice; keep the last
+        facts = list({fact.fact_id: fact for fact in facts}.values())
+        if not facts:
+            return
+        statement = pg_insert(Fact)
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Fact.fact_id],
+                set_={
+                    name: statement.excluded[name]
+                    for name in (
+                        "label",
+                        "description",
+                        "taxonomy",
+                        "fact_type",
+                        "period_type",
+                        "embedding",
+                    )
+                },
+            ),
+            [
+                {
+                    "fact_id": fact.fact_id,
+                    "label": fact.label,
+                    "description": fact.description,
+                    "taxonomy": fact.taxonomy,
+                    "fact_type": fact.fact_type,
+                    "period_type": fact.period_type,
+                    "embedding": _unit_vector(fact.embedding),
+                }
+                for fact in facts
+            ],
+        )
+
+    def get_embedded_fact_ids(self, fact_ids: Iterable[str]) -> Set[str]:
+        """Get which of the given facts are stored with an embedding.
+
+        IDs are looked up ID_BATCH_SIZE at a time, one query per batch.
+
+        Args:
+            fact_ids: Fact IDs
+
+        Returns:
+            IDs of the facts that exist and have an embedding
+        """
+        fact_ids = list(dict.fromkeys(fact_ids))
+        embedded: Set[str] = set()
+        for start in range(0, len(fact_ids), ID_BATCH_SIZE):
+            embedded.update(
+                self.db.scalars(
+                    select(Fact.fact_id).where(
+                        Fact.fact_id.in_(fact_ids[start : start + ID_BATCH_SIZE]),
+                        Fact.embedding.is_not(None),
+                    )
+                )
+            )
+        return embedded
 
     def get_fact(self, fact_id: str) -> Optional[Fact]:
         """Get a fact by ID.
@@ -648,7 +1518,7 @@ class FactRepository:
         Returns:
             Fact if found, None otherwise
         """
-        return self.db.query(Fact).filter(Fact.fact_id == fact_id).first()
+        return self.db.get(Fact, fact_id)
 
     def get_all_facts(self) -> List[Fact]:
         """Get all facts.
@@ -675,9 +1545,8 @@ class FactRepository:
         db_fact.taxonomy = fact.taxonomy
         db_fact.fact_type = fact.fact_type
         db_fact.period_type = fact.period_type
-        db_fact.embedding = fact.embedding
-        self.db.commit()
-        self.db.refresh(db_fact)
+        db_fact.embedding = _unit_vector(fact.embedding)
+        self.db.flush()
         return db_fact
 
     def fact_to_model(self, fact: Fact) -> FactModel:
@@ -696,56 +1565,171 @@ class FactRepository:
         )
 
     def create_fact_value(self, fact_value: FactValueModel) -> FactValue:
-        """Create a fact value.
+        """Create a fact value, or update the stored value for its fact and filing.
 
         Args:
             fact_value: Fact value model
 
         Returns:
-            Created fact value
+            Created or updated fact value
         """
-        db_fact_value = FactValue(
-            fact_id=fact_value.fact_id,
-            ticker=fact_value.ticker,
-            value=fact_value.value,
-            document_id=fact_value.document_id,
-            filing_type=fact_value.filing_type,
-            accession_number=fact_value.accession_number,
-            start_date=fact_value.start_date,
-            end_date=fact_value.end_date,
-            fiscal_year=fact_value.fiscal_year,
-            fiscal_period=fact_value.fiscal_period,
-            unit=fact_value.unit,
-            decimals=fact_value.decimals,
-            form=fact_value.form,
+        statement = pg_insert(FactValue).values(**_fact_value_row(fact_value))
+        return self.db.scalar(
+            statement.on_conflict_do_update(
+                index_elements=FACT_VALUE_KEY,
+                set_={
+                    name: statement.excluded[name]
+                    for name in FACT_VALUE_FIELDS
+                    if name not in FACT_VALUE_KEY
+                },
+            ).returning(FactValue)
         )
-        self.db.add(db_fact_value)
-        self.db.commit()
-        self.db.refresh(db_fact_value)
-        return db_fact_value
 
-    def get_fact_value(self, fact_value_id: str) -> Optional[FactValue]:
+    def create_fact_values(self, fact_values: List[FactValueModel]) -> None:
+        """Upsert fact values in a single executemany without committing.
+
+        Values already stored for the same fact and filing are updated, so
+        re-ingesting a filing does not fail. If a value appears more than
+        once, the last one is kept.
+
+        Args:
+            fact_values: Fact value models
+        """
+        if not fact_values:
+            return
+        # One row per key: a multi-row upsert cannot update a row twice
+        rows = {}
+        for fact_value in fact_values:
+            row = _fact_value_row(fact_value)
+            rows[tuple(row[name] for name in FACT_VALUE_KEY)] = row
+        statement = pg_insert(FactValue)
+        # The model fields are the column names; the driver pages the rows
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=FACT_VALUE_KEY,
+                set_={
+                    name: statement.excluded[name]
+                    for name in FACT_VALUE_FIELDS
+                    if name not in FACT_VALUE_KEY
+                },
+            ),
+            list(rows.values()),
+        )
+
+    def copy_fact_values(self, fact_values: Iterable[FactValueModel]) -> int:
+        """Bulk-load fact values with COPY without committing.
+
+        Rows are sent in batches of COPY_BATCH_SIZE, so memory stays bounded
+        when loading from a generator. They are copied into a temporary table
+        inside the session's current transaction and merged from there, so
+        values already stored for the same fact and filing are updated
+        instead of failing on the unique key. If a value appears more than
+        once, one of them is kept.
+
+        Args:
+            fact_values: Fact value models
+
+        Returns:
+            Number of fact values loaded
+        """
+        columns = ", ".join(FACT_VALUE_FIELDS)
+        key = ", ".join(FACT_VALUE_KEY)
+        updates = ", ".join(
+            f"{name} = excluded.{name}"
+            for name in FACT_VALUE_FIELDS
+            if name not in FACT_VALUE_KEY
+        )
+        statement = f"COPY fact_values_load ({columns}) FROM STDIN"
+
+        # Same columns as fact_values, without its constraints
+        self.db.execute(
+            text(
+                "CREATE TEMP TABLE fact_values_load ON COMMIT DROP AS "
+                f"SELECT {columns} FROM fact_values WITH NO DATA"
+            )
+        )
+        cursor = self.db.connection().connection.cursor()
+
+        count = 0
+        buffer = io.StringIO()
+        for count, fact_value in enumerate(fact_values, start=1):
+            row = _fact_value_row(fact_value)
+            buffer.write("\t".join(_copy_text(row[name]) for name in FACT_VALUE_FIELDS))
+            buffer.write("\n")
+            if count % COPY_BATCH_SIZE == 0:
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                buffer = io.StringIO()
+        if buffer.tell():
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+
+        self.db.execute(
+            text(
+                f"INSERT INTO fact_values ({columns}) "
+                f"SELECT DISTINCT ON ({key}) {columns} FROM fact_values_load "
+                f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+            )
+        )
+        self.db.execute(text("DROP TABLE fact_values_load"))
+        return count
+
+    def get_fact_value(
+        self, fact_value_id: Union[int, str], fiscal_year: Optional[int] = None
+    ) -> Optional[FactValue]:
         """Get a fact value by ID.
 
+        The primary key is (id, fiscal_year); with the fiscal year the lookup
+        uses the identity map and touches a single partition, without it
+        every partition's key index is probed.
+
         Args:
             fact_value_id: Fact value ID
+            fiscal_year: Fiscal year of the value, if known
 
         Returns:
             Fact value if found, None otherwise
         """
-        return (
-            self.db.query(FactValue)
-            .filter(FactValue.fact_value_id == fact_value_id)
-            .first()
+        fact_value_id = int(fact_value_id)
+        if fiscal_year is not None:
+            return self.db.get(FactValue, (fact_value_id, fiscal_year))
+        return self.db.scalars(
+            lambda_stmt(
+                lambda: select(FactValue).where(FactValue.id == fact_value_id).limit(1)
+            )
+        ).first()
+
+    def get_all_fact_values(
+        self, chunk_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[FactValue]:
+        """Iterate over all fact values with a server-side cursor.
+
+        Args:
+            chunk_size: Number of fact values fetched per round trip
+
+        Returns:
+            Iterator of fact values
+        """
+        yield from self.db.scalars(
+            select(FactValue).execution_options(yield_per=chunk_size)
         )
 
-    def get_all_fact_values(self) -> List[FactValue]:
-        """Get all fact values.
+    def stream_fact_value_rows(
+        self, chunk_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[Row]:
+        """Stream the FactValue model columns of all fact values.
+
+        No ORM entities are built, so rows are not tracked by the session.
+
+        Args:
+            chunk_size: Number of rows fetched per round trip
 
         Returns:
-            List of fact values
+            Iterator of rows with the FactValue model fields
         """
-        return self.db.query(FactValue).all()
+        return self.db.execute(
+            select(*FACT_VALUE_MODEL_COLUMNS).execution_options(yield_per=chunk_size)
+        )
 
     def fact_value_to_model(self, fact_value: FactValue) -> FactValueModel:
         """Convert a fact value entity to a model.
@@ -772,6 +1756,24 @@ class FactRepository:
             form=fact_value.form,
         )
 
+    def fact_values_to_models(self, fact_values: Iterable[Any]) -> List[FactValueModel]:
+        """Convert fact value entities or rows to models in bulk.
+
+        Values read from the database already conform to the model, so the
+        models are built without validation.
+
+        Args:
+            fact_values: Fact value entities or rows with the model fields
+
+        Returns:
+            Fact value models
+        """
+        construct = FactValueModel.model_construct
+        return [
+            construct(**dict(zip(FACT_VALUE_FIELDS, _fact_value_fields(fact_value))))
+            for fact_value in fact_values
+        ]
+
     def get_fact_values_by_fact(self, fact_id: str) -> List[FactValue]:
         """Get all fact values for a fact.
 
@@ -781,7 +1783,34 @@ class FactRepository:
         Returns:
             List of fact values
         """
-        return self.db.query(FactValue).filter(FactValue.fact_id == fact_id).all()
+        # A lambda statement is built and cache-keyed once; later calls only
+        # bind the new fact_id
+        return self.db.scalars(
+            lambda_stmt(lambda: select(FactValue).where(FactValue.fact_id == fact_id))
+        ).all()
+
+    def get_fact_values_by_facts(self, fact_ids: Iterable[str]) -> Dict[str, List[Row]]:
+        """Get the fact values of several facts, grouped by fact ID.
+
+        IDs are looked up ID_BATCH_SIZE at a time, one query per batch.
+
+        Args:
+            fact_ids: Fact IDs
+
+        Returns:
+            Dictionary mapping fact IDs to rows with the FactValue model fields
+        """
+        fact_ids = list(dict.fromkeys(fact_ids))
+        grouped: Dict[str, List[Row]] = {}
+        for start in range(0, len(fact_ids), ID_BATCH_SIZE):
+            rows = self.db.execute(
+                select(*FACT_VALUE_MODEL_COLUMNS).where(
+                    FactValue.fact_id.in_(fact_ids[start : start + ID_BATCH_SIZE])
+                )
+            )
+            for row in rows:
+                grouped.setdefault(row.fact_id, []).append(row)
+        return grouped
 
     def get_fact_value_by_details(
         self,
@@ -804,14 +1833,32 @@ class FactRepository:
             Fact value if found, None otherwise
         """
         document_id = generate_document_id(ticker, year, quarter, filing_type)
-        return (
-            self.db.query(FactValue)
-            .filter(
-                FactValue.fact_id == fact_id,
-                FactValue.document_id == document_id,
+        return self.db.scalars(
+            lambda_stmt(
+                lambda: select(FactValue)
+                .where(
+                    FactValue.fact_id == fact_id,
+                    FactValue.document_id == document_id,
+                )
+                .limit(1)
             )
-            .first()
+        ).first()
+
+    def get_fact_value_keys(self, ticker: str) -> Set[Tuple[str, str]]:
+        """Get the (fact ID, document ID) pairs that already have values.
+
+        Args:
+            ticker: Company ticker
+
+        Returns:
+            Set of (fact_id, document_id) tuples
+        """
+        rows = self.db.execute(
+            select(FactValue.fact_id, FactValue.document_id)
+            .where(FactValue.ticker == ticker)
+            .distinct()
         )
+        return {(fact_id, document_id) for fact_id, document_id in rows}
 
     def get_fact_values_by_details(
         self,
@@ -847,9 +1894,64 @@ class FactRepository:
             .all()
         )
 
+    def get_fact_values_bulk(
+        self,
+        fact_ids: List[str],
+        tickers: List[str],
+        years: List[int],
+        periods: Iterable[Tuple[Optional[int], str]],
+        limit_per_document: int = 30,
+    ) -> List[Row]:
+        """Get fact values for every combination of the given details in one query.
+
+        Args:
+            fact_ids: Fact IDs
+            tickers: Company tickers
+            years: Fiscal years
+            periods: (fiscal period, filing type) pairs
+            limit_per_document: Maximum number of values per fact and document
+
+        Returns:
+            List of rows with the FactValue model fields
+        """
+        document_ids = {
+            generate_document_id(ticker, year, quarter, filing_type)
+            for ticker in tickers
+            for year in years
+            for quarter, filing_type in periods
+        }
+        if not (fact_ids and document_ids):
+            return []
+
+        ranked = (
+            select(
+                *FACT_VALUE_MODEL_COLUMNS,
+                func.row_number()
+                .over(
+                    partition_by=(FactValue.fact_id, FactValue.document_id),
+                    order_by=FactValue.id,
+                )
+                .label("rank"),
+            )
+            .where(
+                FactValue.fact_id.in_(fact_ids),
+                FactValue.ticker.in_(tickers),
+                # Document IDs embed the fiscal year; filtering on it too lets
+                # Postgres prune the other yearly partitions
+                FactValue.fiscal_year.in_(years),
+                FactValue.document_id.in_(sorted(document_ids)),
+            )
+            .subquery()
+        )
+        return self.db.execute(
+            select(*(ranked.c[column.key] for column in FACT_VALUE_MODEL_COLUMNS))
+            .where(ranked.c.rank <= limit_per_document)
+            .order_by(ranked.c.document_id.desc())
+        ).all()
+
     def search_facts_by_embedding(
-        self, query_embedding: List[float], top_k: int = 5
-    ) -> List[Fact]:
+        self, query_embedding: Union[List[float], np.ndarray], top_k: int = 5
+    ) -> List[Row]:
         """
         Search for facts using vector similarity.
 
@@ -858,29 +1960,99 @@ class FactRepository:
             top_k: Number of results to return
 
         Returns:
-            List of tuples containing (fact, similarity_score)
+            Rows of the most similar facts' columns followed by the distance
+            (negative inner product), nearest first; empty for an empty or
+            all-zero query, which has no direction to compare
         """
-        # Convert query embedding to array
-        query_vector = query_embedding
-
-        # Use cosine similarity with pgvector
-        results = (
-            self.db.query(
-                Fact, Fact.embedding.cosine_distance(query_vector).label("distance")
+        # Shortlist candidates by Hamming distance on the binary-quantized
+        # index, then re-rank them with pgvector's negative inner product
+        # (<#>), which ranks unit vectors like cosine distance.
+        # Facts without an embedding are skipped explicitly: they are not in
+        # the HNSW index, but a sequential scan would still rank them last
+        # with a NULL distance. Iterative scanning keeps the index usable.
+        unit_query = _unit_vector(query_embedding)
+        if unit_query is None:
+            return []
+        query_embedding = _halfvec(unit_query)
+        candidate_count = top_k * RERANK_FACTOR
+        _set_ef_search(self.db, candidate_count)
+        _set_iterative_scan(self.db)
+
+        candidates = (
+            select(Fact.fact_id, Fact.embedding)
+            .where(Fact.embedding.is_not(None))
+            .order_by(
+                FACT_EMBEDDING_BITS.hamming_distance(_binary_quantized(query_embedding))
             )
-            .filter(Fact.embedding is not None)
-            .order_by("distance")
+            .limit(candidate_count)
+            .subquery()
+        )
+
+        # The ORDER BY matches the selected distance, so it is computed once
+        distance = candidates.c.embedding.max_inner_product(query_embedding)
+        return self.db.execute(
+            select(*FACT_SEARCH_COLUMNS, distance.label("distance"))
+            .join(candidates, Fact.fact_id == candidates.c.fact_id)
+            .order_by(distance)
             .limit(top_k)
-            .all()
+        ).all()
+
+    def search_facts_by_embeddings(
+        self, query_embeddings: List[List[float]], top_k: int = 5
+    ) -> List[List[Row]]:
+        """
+        Search for facts similar to each of several query vectors at once.
+
+        All queries run in one statement: the query vectors are a VALUES list
+        and each one drives its own top-k HNSW scan through a LATERAL join.
+
+        Args:
+            query_embeddings: Query vectors
+            top_k: Number of results to return per query
+
+        Returns:
+            For each query, in order, rows of the most similar facts' columns
+            followed by the distance (negative inner product), nearest first;
+            empty for empty or all-zero queries
+        """
+        results: List[List[Row]] = [[] for _ in query_embeddings]
+        # Queries without a direction would only bind NULL distances
+        unit_queries = [
+            (idx, unit_query)
+            for idx, unit_query in enumerate(map(_unit_vector, query_embeddings))
+            if unit_query is not None
+        ]
+        if not unit_queries:
+            return results
+
+        queries = values(
+            column("idx", Integer), column("embedding", HALFVEC(3072)), name="queries"
+        ).data(
+            [(idx, cast(unit_query, HALFVEC(3072))) for idx, unit_query in unit_queries]
+        )
+        distance = Fact.embedding.max_inner_product(queries.c.embedding)
+        nearest = (
+            select(*FACT_SEARCH_COLUMNS, distance.label("distance"))
+            .where(Fact.embedding.is_not(None))
+            .order_by(distance)
+            .limit(top_k)
+            .lateral("nearest")
         )
 
-        
-        # Convert distance to similarity score (cosine distance = 1 - cosine similarity)
-        return [fact for fact, _ in results]
+        _set_ef_search(self.db, top_k)
+        _set_iterative_scan(self.db)
+        rows = self.db.execute(
+            select(queries.c.idx, *nearest.c)
+            .join(nearest, true())
+            .order_by(queries.c.idx, nearest.c.distance)
+        )
+        for row in rows:
+            results[row.idx].append(row)
+        return results
 
     def search_facts_by_text(
         self, query: str, embedding_service, top_k: int = 5
-    ) -> List[Tuple[Fact, float]]:
+    ) -> List[Tuple[Row, float]]:
         """
         Search for facts using text query.
 
@@ -890,11 +2062,14 @@ class FactRepository:
             top_k: Number of results to return
 
         Returns:
-            List of tuples containing (fact, similarity_score)
+            List of tuples containing (fact row, similarity_score)
         """
-        # Generate embedding for the query
-        query_embedding = embedding_service.generate_embedding(query)
-        return self.search_facts_by_embedding(query_embedding, top_k)
+        # Generate embedding for the query, or reuse it for a repeated query
+        query_embedding = _embed_query(embedding_service, query)
+        return [
+            (row, -row.distance)
+            for row in self.search_facts_by_embedding(query_embedding, top_k)
+        ]
 
     def get_facts_values_by_company_and_year(
         self, ticker: str, year: int
@@ -913,3 +2088,80 @@ class FactRepository:
             .filter(FactValue.ticker == ticker, FactValue.fiscal_year == year)
             .all()
         )
+
+    def get_fact_values_by_ticker(self, ticker: str) -> List[Row]:
+        """Get all fact values for a company.
+
+        Args:
+            ticker: Company ticker
+
+        Returns:
+            List of rows with the FactValue model fields
+        """
+        return self.db.execute(
+            select(*FACT_VALUE_MODEL_COLUMNS).where(FactValue.ticker == ticker)
+        ).all()
+
+    def get_year_over_year_changes(
+        self, ticker: str, fact_ids: List[str]
+    ) -> List[Tuple[str, int, int, float]]:
+        """Get year-over-year percentage changes computed in the database.
+
+        Each period's latest reported value is compared with the same fiscal
+        period of the previous fiscal year using a window function.
+
+        Args:
+            ticker: Company ticker
+            fact_ids: Fact IDs to compute changes for
+
+        Returns:
+            List of (fact_id, fiscal_year, fiscal_period, percent_change) tuples
+        """
+        # Latest reported value per (fact, year, period); later filings restate
+        latest = (
+            select(
+                FactValue.fact_id,
+                FactValue.fiscal_year,
+                FactValue.fiscal_period,
+                FactValue.value,
+            )
+            .where(FactValue.ticker == ticker, FactValue.fact_id.in_(fact_ids))
+            .distinct(FactValue.fact_id, FactValue.fiscal_year, FactValue.fiscal_period)
+            .order_by(
+                FactValue.fact_id,
+                FactValue.fiscal_year,
+                FactValue.fiscal_period,
+                FactValue.id.desc(),
+            )
+            .subquery()
+        )
+
+        window = {
+            "partition_by": (latest.c.fact_id, latest.c.fiscal_period),
+            "order_by": latest.c.fiscal_year,
+        }
+        previous_value = func.lag(latest.c.value).over(**window)
+        changes = select(
+            latest.c.fact_id,
+            latest.c.fiscal_year,
+            latest.c.fiscal_period,
+            (
+                (latest.c.value - previous_value)
+                / func.abs(func.nullif(previous_value, 0))
+                * 100
+            ).label("change"),
+            func.lag(latest.c.fiscal_year).over(**window).label("previous_year"),
+        ).subquery()
+
+        rows = self.db.execute(
+            select(
+                changes.c.fact_id,
+                changes.c.fiscal_year,
+                changes.c.fiscal_period,
+                changes.c.change,
+            ).where(
+                changes.c.change.isnot(None),
+                changes.c.previous_year == changes.c.fiscal_year - 1,
+            )
+        ).all()
+        return [tuple(row) for row in rows]
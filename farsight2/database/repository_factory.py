@@ -1,8 +1,12 @@
-"""Factory for creating repository instances."""
+"""Factory for creating repository instances.
+
+Repositories are bound to the thread-local SessionLocal registry, so a
+repository shared across worker threads uses a separate session per thread.
+"""
 
 from typing import Dict, Union
 
-from farsight2.database.db import get_db_session
+from farsight2.database.db import SessionLocal
 from farsight2.database.repository import (
     CompanyRepository,
     DocumentRepository,
@@ -20,25 +24,25 @@ class RepositoryFactory:
     @staticmethod
     def create_company_repository():
         """Create a company repository."""
-        session = get_db_session()
+        session = SessionLocal
         return CompanyRepository(session)
 
     @staticmethod
     def create_document_repository():
         """Create a document repository."""
-        session = get_db_session()
+        session = SessionLocal
         return DocumentRepository(session)
 
     @staticmethod
     def create_chunk_repository():
         """Create a chunk repository."""
-        session = get_db_session()
+        session = SessionLocal
         return ChunkRepository(session)
 
     @staticmethod
     def create_embedding_repository():
         """Create an embedding repository."""
-        session = get_db_session()
+        session = SessionLocal
         return EmbeddingRepository(session)
 
 
@@ -46,19 +50,19 @@ class RepositoryFactory:
     @staticmethod
     def create_text_chunk_repository():
         """Create a text chunk repository."""
-        session = get_db_session()
+        session = SessionLocal
         return TextChunkRepository(session)
 
     @staticmethod
     def create_table_repository():
         """Create a table repository."""
-        session = get_db_session()
+        session = SessionLocal
         return TableRepository(session)
 
     @staticmethod
     def create_fact_repository():
         """Create a fact repository."""
-        session = get_db_session()
+        session = SessionLocal
         return FactRepository(session)
 
     @staticmethod
@@ -75,13 +79,17 @@ class RepositoryFactory:
         ],
     ]:
         """Create all repositories."""
-        session = get_db_session()
+        session = SessionLocal
+        # Repositories that use each other share the same instances
+        company_repo = CompanyRepository(session)
+        document_repo = DocumentRepository(session, company_repo)
+        chunk_repo = ChunkRepository(session, document_repo)
         return {
-            "company": CompanyRepository(session),
-            "document": DocumentRepository(session),
-            "chunk": ChunkRepository(session),
-            "embedding": EmbeddingRepository(session),
-            "text_chunk": TextChunkRepository(session),
-            "table": TableRepository(session),
+            "company": company_repo,
+            "document": document_repo,
+            "chunk": chunk_repo,
+            "embedding": EmbeddingRepository(session, chunk_repo),
+            "text_chunk": TextChunkRepository(session, document_repo),
+            "table": TableRepository(session, document_repo),
             "fact": FactRepository(session),
         }
@@ -1,6 +1,21 @@
 """Unified repository class that combines all repositories."""
 
-from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+from contextlib import contextmanager
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 import logging
 import numpy as np
 
@@ -11,6 +26,7 @@ from farsight2.models.models import (
     EmbeddedChunk,
     Fact,
     FactValue,
+    ParsedDocument,
     RelevantChunk,
     TextChunk as TextChunkModel,
     Table as TableModel,
@@ -19,21 +35,66 @@ from farsight2.database.repository_factory import RepositoryFactory
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _ends_read_transaction(method: Callable[..., T]) -> Callable[..., T]:
+    """End the session's transaction once a read method returns.
+
+    Reads begin a transaction on the thread-local session that would
+    otherwise stay open, keeping a pooled connection idle in transaction.
+    Committing it returns the connection to the pool, and with
+    expire_on_commit disabled the loaded objects stay usable.
+    """
+
+    @wraps(method)
+    def wrapper(self: "UnifiedRepository", *args: Any, **kwargs: Any) -> T:
+        with self.unit_of_work():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class UnifiedRepository:
     """Unified repository class that combines all repositories for the Postgres database."""
 
+    # Maximum number of searches run concurrently by the async methods
+    MAX_CONCURRENT_SEARCHES = 16
+
     def __init__(self):
         """Initialize the repository."""
         self._repos = RepositoryFactory.create_all_repositories()
 
+    @contextmanager
+    def unit_of_work(self) -> Iterator[None]:
+        """Commit the shared session once on success and roll back on error.
+
+        Units of work nest: repository calls made inside an outer unit of work
+        join its transaction, which commits once when the outermost one ends.
+        """
+        db = self._repos["document"].db
+        depth = db.info.get("unit_of_work_depth", 0)
+        db.info["unit_of_work_depth"] = depth + 1
+        try:
+            yield
+            if not depth:
+                db.commit()
+        except Exception:
+            if not depth:
+                db.rollback()
+            raise
+        finally:
+            db.info["unit_of_work_depth"] = depth
+
     # Company methods
 
     def create_company(self, ticker: str, name: Optional[str] = None) -> CompanyModel:
         """Create a company."""
-        company = self._repos["company"].create_company(ticker, name)
+        with self.unit_of_work():
+            company = self._repos["company"].create_company(ticker, name)
         return self._repos["company"].to_model(company)
 
+    @_ends_read_transaction
     def get_company(self, ticker: str) -> Optional[CompanyModel]:
         """Get a company by ticker."""
         company = self._repos["company"].get_company(ticker)
@@ -41,113 +102,140 @@ class UnifiedRepository:
 
     def get_all_companies(self) -> List[CompanyModel]:
         """Get all companies."""
-        companies = self._repos["company"].get_all_companies()
-        return [self._repos["company"].to_model(company) for company in companies]
+        return list(self.iter_all_companies())
+
+    def iter_all_companies(self) -> Iterator[CompanyModel]:
+        """Iterate over all companies, fetching them in batches."""
+        with self.unit_of_work():
+            for company in self._repos["company"].iter_all():
+                yield self._repos["company"].to_model(company)
 
     # Document methods
 
     def create_document(self, document: DocumentMetadata) -> DocumentMetadata:
         """Create a document."""
-        doc = self._repos["document"].create_document(document)
+        with self.unit_of_work():
+            doc = self._repos["document"].create_document(document)
         return self._repos["document"].to_model(doc)
 
+    @_ends_read_transaction
     def get_document(
         self, ticker: str, year: int, quarter: Optional[int], filing_type: str
     ) -> Optional[DocumentMetadata]:
         """Get a document by criteria."""
-        docs = self._repos["document"].get_documents_by_ticker_year_and_quarter(
-            ticker, year, quarter
+        row = self._repos["document"].get_document_row(
+            ticker, year, quarter, filing_type
         )
-        for doc in docs:
-            if doc.filing_type == filing_type:
-                return self._repos["document"].to_model(doc)
-        return None
+        return DocumentMetadata(**row._mapping) if row else None
 
+    @_ends_read_transaction
     def get_document_by_id(self, document_id: str) -> Optional[DocumentMetadata]:
         """Get a document by ID."""
         doc = self._repos["document"].get_document(document_id)
         return self._repos["document"].to_model(doc) if doc else None
 
+    @_ends_read_transaction
     def get_documents_by_company(self, ticker: str) -> List[DocumentMetadata]:
         """Get documents by company."""
-        docs = self._repos["document"].get_documents_by_ticker(ticker)
-        return [self._repos["document"].to_model(doc) for doc in docs]
-
+        rows = self._repos["document"].stream_document_rows(ticker=ticker)
+        return [DocumentMetadata(**row._mapping) for row in rows]
+
+    @_ends_read_transaction
+    def get_documents_by_companies(
+        self, tickers: List[str]
+    ) -> Dict[str, List[DocumentMetadata]]:
+        """Get documents for several companies, grouped by ticker."""
+        grouped = self._repos["document"].get_documents_grouped_by_ticker(tickers)
+        return {
+            ticker: [DocumentMetadata(**document) for document in documents]
+            for ticker, documents in grouped.items()
+        }
+
+    @_ends_read_transaction
     def get_all_documents(self, limit: int = 100) -> List[DocumentMetadata]:
         """Get all documents."""
-        docs = self._repos["document"].get_all_documents()
-        return [self._repos["document"].to_model(doc) for doc in docs[:limit]]
+        rows = self._repos["document"].stream_document_rows(limit=limit)
+        return [DocumentMetadata(**row._mapping) for row in rows]
 
-    def delete_document(self, document_id: str) -> bool:
-        """Delete a document."""
-        doc = self._repos["document"].get_document(document_id)
-        if not doc:
-            return False
+    def iter_all_documents(self) -> Iterator[DocumentMetadata]:
+        """Iterate over all documents, fetching them in batches."""
+        with self.unit_of_work():
+            for row in self._repos["document"].stream_document_rows():
+                yield DocumentMetadata(**row._mapping)
 
-        # Delete all related entities
+    def delete_document(self, document_id: str) -> bool:
+        """Delete a document; its content is removed by the database cascades."""
         try:
-            # Delete chunks and embeddings
-            chunks = self._repos["chunk"].get_chunks_by_document(document_id)
-            for chunk in chunks:
-                embedding = self._repos["embedding"].get_embedding(chunk.chunk_id)
-                if embedding:
-                    self._repos["embedding"].db.delete(embedding)
-                self._repos["chunk"].db.delete(chunk)
-
-            # Delete text chunks
-            text_chunks = self._repos["text_chunk"].get_text_chunks_by_document(
-                document_id
-            )
-            for chunk in text_chunks:
-                self._repos["text_chunk"].db.delete(chunk)
-
-            # Delete tables
-            tables = self._repos["table"].get_tables_by_document(document_id)
-            for table in tables:
-                self._repos["table"].db.delete(table)
-
-            # Delete document
-            self._repos["document"].db.delete(doc)
-            self._repos["document"].db.commit()
-
-            return True
+            with self.unit_of_work():
+                return self._repos["document"].delete_document(document_id)
         except Exception as e:
             logger.error(f"Error deleting document: {e}")
-            self._repos["document"].db.rollback()
             return False
 
     # Content chunk methods
 
     def create_content_chunk(
-        self, chunk: DocumentChunkModel, embedding: List[float] = None
+        self,
+        chunk: DocumentChunkModel,
+        embedding: Optional[Union[List[float], np.ndarray]] = None,
     ) -> DocumentChunkModel:
         """Create a content chunk."""
-        db_chunk = self._repos["chunk"].create_chunk(chunk)
+        with self.unit_of_work():
+            db_chunk = self._repos["chunk"].create_chunk(chunk)
 
-        # If embedding is provided, create embedding record
-        if embedding:
-            embedded_chunk = EmbeddedChunk(chunk=chunk, embedding=embedding)
-            self._repos["embedding"].create_embedding(embedded_chunk)
+            # If embedding is provided, create embedding record
+            if embedding is not None and len(embedding):
+                embedded_chunk = EmbeddedChunk(chunk=chunk, embedding=embedding)
+                self._repos["embedding"].create_embedding(embedded_chunk)
 
         return self._repos["chunk"].to_model(db_chunk)
 
+    def create_content_chunks(
+        self,
+        chunks: List[DocumentChunkModel],
+        embeddings: List[Union[List[float], np.ndarray]],
+    ) -> None:
+        """
+        Create content chunks and their embeddings in bulk.
+
+        Chunks are inserted with one executemany and embeddings are streamed
+        with COPY, all in a single transaction. Re-processing a document keeps
+        its existing chunks and replaces their embeddings.
+
+        Args:
+            chunks: Document chunks to store
+            embeddings: Embedding for each chunk, in the same order
+        """
+        with self.unit_of_work():
+            self._repos["chunk"].create_chunks(chunks, skip_existing=True)
+            self._repos["embedding"].copy_embeddings(
+                [
+                    (chunk.chunk_id, embedding)
+                    for chunk, embedding in zip(chunks, embeddings)
+                    if len(embedding)
+                ]
+            )
+
+    @_ends_read_transaction
     def get_content_chunk(self, chunk_id: str) -> Optional[DocumentChunkModel]:
         """Get a content chunk by ID."""
         chunk = self._repos["chunk"].get_chunk(chunk_id)
         return self._repos["chunk"].to_model(chunk) if chunk else None
 
+    @_ends_read_transaction
     def get_content_chunks_by_document(
         self, document_id: str
     ) -> List[DocumentChunkModel]:
         """Get content chunks by document."""
-        chunks = self._repos["chunk"].get_chunks_by_document(document_id)
-        return [self._repos["chunk"].to_model(chunk) for chunk in chunks]
+        rows = self._repos["chunk"].stream_chunk_rows(document_id)
+        return [DocumentChunkModel(**row._mapping) for row in rows]
 
     # Search methods
 
+    @_ends_read_transaction
     def search_embeddings(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         top_k: int = 5,
         filter_dict: Optional[Dict[str, Any]] = None,
     ) -> List[RelevantChunk]:
@@ -155,23 +243,43 @@ class UnifiedRepository:
         results = self._repos["embedding"].search_embeddings(
             query_embedding, top_k, filter_dict
         )
-        relevant_chunks = []
-
-        for chunk, score in results:
-            chunk_model = self._repos["chunk"].to_model(chunk)
-            relevant_chunks.append(
-                RelevantChunk(chunk=chunk_model, relevance_score=score)
+        # Rows also carry the distance column, which the model ignores
+        return [
+            RelevantChunk(
+                chunk=DocumentChunkModel(**row._mapping), relevance_score=score
             )
+            for row, score in results
+        ]
+
+    @_ends_read_transaction
+    def search_chunk_ids(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, str, str, float]]:
+        """Search for relevant chunk IDs without loading chunk content."""
+        return self._repos["embedding"].search_chunk_ids(
+            query_embedding, top_k, filter_dict
+        )
 
-        return relevant_chunks
+    @_ends_read_transaction
+    def get_content_chunks_by_ids(
+        self, chunk_ids: List[str]
+    ) -> List[DocumentChunkModel]:
+        """Get content chunks by ID in a single query."""
+        rows = self._repos["chunk"].get_chunk_rows_by_ids(chunk_ids)
+        return [DocumentChunkModel(**row._mapping) for row in rows]
 
     # Text chunk methods
 
     def create_text_chunk(self, text_chunk: TextChunkModel) -> TextChunkModel:
         """Create a text chunk."""
-        db_chunk = self._repos["text_chunk"].create_text_chunk(text_chunk)
+        with self.unit_of_work():
+            db_chunk = self._repos["text_chunk"].create_text_chunk(text_chunk)
         return self._repos["text_chunk"].to_model(db_chunk)
 
+    @_ends_read_transaction
     def get_text_chunk(self, chunk_id: str) -> Optional[TextChunkModel]:
         """Get a text chunk by ID."""
         chunk = self._repos["text_chunk"].get_text_chunk(chunk_id)
@@ -181,14 +289,31 @@ class UnifiedRepository:
 
     def create_table(self, table: TableModel) -> TableModel:
         """Create a table."""
-        db_table = self._repos["table"].create_table(table)
+        with self.unit_of_work():
+            db_table = self._repos["table"].create_table(table)
         return self._repos["table"].to_model(db_table)
 
+    @_ends_read_transaction
     def get_table(self, chunk_id: str) -> Optional[TableModel]:
         """Get a table by ID."""
         table = self._repos["table"].get_table(chunk_id)
         return self._repos["table"].to_model(table) if table else None
 
+    def create_parsed_document(self, parsed_document: ParsedDocument) -> None:
+        """
+        Store a parsed document with its text chunks and tables.
+
+        The document, its text chunks and its tables are written in one
+        transaction, with one insert statement per entity type.
+
+        Args:
+            parsed_document: Parsed document to store
+        """
+        with self.unit_of_work():
+            self._repos["document"].create_document(parsed_document.metadata)
+            self._repos["text_chunk"].create_text_chunks(parsed_document.text_chunks)
+            self._repos["table"].create_tables(parsed_document.tables)
+
     def create_fact(self, fact: Fact) -> Fact:
         """
         Create a fact definition in the database.
@@ -200,11 +325,36 @@ class UnifiedRepository:
             The created fact
         """
         try:
-            db_fact = self._repos["fact"].create_fact(fact)
+            with self.unit_of_work():
+                db_fact = self._repos["fact"].create_fact(fact)
             return self._repos["fact"].fact_to_model(db_fact)
         except Exception:
             return None
 
+    def create_facts(self, facts: List[Fact]) -> None:
+        """
+        Create or update embedded fact definitions in one transaction.
+
+        Args:
+            facts: Fact models with their embeddings
+        """
+        with self.unit_of_work():
+            self._repos["fact"].create_facts(facts)
+
+    @_ends_read_transaction
+    def get_embedded_fact_ids(self, fact_ids: Iterable[str]) -> Set[str]:
+        """
+        Get which of the given facts are already stored with an embedding.
+
+        Args:
+            fact_ids: Fact IDs
+
+        Returns:
+            IDs of the facts that exist and have an embedding
+        """
+        return self._repos["fact"].get_embedded_fact_ids(fact_ids)
+
+    @_ends_read_transaction
     def get_fact(self, fact_id: str) -> Optional[Fact]:
         """
         Get a fact by ID.
@@ -218,6 +368,7 @@ class UnifiedRepository:
         db_fact = self._repos["fact"].get_fact(fact_id)
         return self._repos["fact"].fact_to_model(db_fact) if db_fact else None
 
+    @_ends_read_transaction
     def get_all_facts(self) -> List[Fact]:
         """
         Get all facts.
@@ -230,9 +381,11 @@ class UnifiedRepository:
 
     def update_fact(self, fact: Fact) -> Fact:
         """Update a fact."""
-        db_fact = self._repos["fact"].update_fact(fact)
+        with self.unit_of_work():
+            db_fact = self._repos["fact"].update_fact(fact)
         return self._repos["fact"].fact_to_model(db_fact)
 
+    @_ends_read_transaction
     def get_facts_by_taxonomy(self, taxonomy: str) -> List[Fact]:
         """
         Get facts by taxonomy.
@@ -246,6 +399,7 @@ class UnifiedRepository:
         facts = self._repos["fact"].get_facts_by_taxonomy(taxonomy)
         return [self._repos["fact"].fact_to_model(fact) for fact in facts]
 
+    @_ends_read_transaction
     def get_primary_facts(self) -> List[Fact]:
         """
         Get primary financial metrics.
@@ -266,26 +420,56 @@ class UnifiedRepository:
         Returns:
             The created fact value
         """
-        db_fact_value = self._repos["fact"].create_fact_value(fact_value)
+        with self.unit_of_work():
+            db_fact_value = self._repos["fact"].create_fact_value(fact_value)
         return self._repos["fact"].fact_value_to_model(db_fact_value)
 
-    def get_fact_value(self, fact_value_id: str) -> Optional[FactValue]:
+    def create_fact_values(self, fact_values: List[FactValue]) -> None:
+        """
+        Create or update fact values in bulk with one multi-row upsert and one commit.
+
+        Args:
+            fact_values: FactValue models to store
+        """
+        with self.unit_of_work():
+            self._repos["fact"].create_fact_values(fact_values)
+
+    def copy_fact_values(self, fact_values: Iterable[FactValue]) -> int:
+        """
+        Bulk-load fact values with COPY in one transaction, updating stored ones.
+
+        Args:
+            fact_values: FactValue models to store
+
+        Returns:
+            Number of fact values loaded
+        """
+        with self.unit_of_work():
+            return self._repos["fact"].copy_fact_values(fact_values)
+
+    @_ends_read_transaction
+    def get_fact_value(
+        self, fact_value_id: Union[int, str], fiscal_year: Optional[int] = None
+    ) -> Optional[FactValue]:
         """
         Get a fact value by ID.
 
         Args:
             fact_value_id: Unique fact value identifier
+            fiscal_year: Fiscal year of the value, if known, to look in one
+                partition only
 
         Returns:
             FactValue if found, None otherwise
         """
-        db_fact_value = self._repos["fact"].get_fact_value(fact_value_id)
+        db_fact_value = self._repos["fact"].get_fact_value(fact_value_id, fiscal_year)
         return (
             self._repos["fact"].fact_value_to_model(db_fact_value)
             if db_fact_value
             else None
         )
 
+    @_ends_read_transaction
     def get_fact_value_by_details(
         self,
         fact_id: str,
@@ -315,6 +499,20 @@ class UnifiedRepository:
             else None
         )
 
+    @_ends_read_transaction
+    def get_fact_value_keys(self, ticker: str) -> Set[Tuple[str, str]]:
+        """
+        Get the (fact ID, document ID) pairs that already have values.
+
+        Args:
+            ticker: Company ticker symbol
+
+        Returns:
+            Set of (fact_id, document_id) tuples stored for the company
+        """
+        return self._repos["fact"].get_fact_value_keys(ticker)
+
+    @_ends_read_transaction
     def get_fact_values_by_details(
         self,
         fact_id: str,
@@ -338,8 +536,33 @@ class UnifiedRepository:
         db_fact_values = self._repos["fact"].get_fact_values_by_details(
             fact_id, ticker, year, quarter, filing_type
         )
-        return [self._repos["fact"].fact_value_to_model(fv) for fv in db_fact_values]
+        return self._repos["fact"].fact_values_to_models(db_fact_values)
 
+    @_ends_read_transaction
+    def get_fact_values_bulk(
+        self,
+        fact_ids: List[str],
+        tickers: List[str],
+        years: List[int],
+        periods: Iterable[Tuple[Optional[int], str]],
+    ) -> List[FactValue]:
+        """Get fact values for every combination of the given details.
+
+        Args:
+            fact_ids: Fact IDs
+            tickers: Company tickers
+            years: Fiscal years
+            periods: (fiscal period, filing type) pairs
+
+        Returns:
+            List of fact values matching any combination of the details
+        """
+        rows = self._repos["fact"].get_fact_values_bulk(
+            fact_ids, tickers, years, periods
+        )
+        return self._repos["fact"].fact_values_to_models(rows)
+
+    @_ends_read_transaction
     def get_fact_values_by_ticker(self, ticker: str) -> List[FactValue]:
         """
         Get all fact values for a company.
@@ -350,9 +573,26 @@ class UnifiedRepository:
         Returns:
             List of fact values for the company
         """
-        fact_values = self._repos["fact"].get_fact_values_by_ticker(ticker)
-        return [self._repos["fact"].fact_value_to_model(fv) for fv in fact_values]
+        rows = self._repos["fact"].get_fact_values_by_ticker(ticker)
+        return self._repos["fact"].fact_values_to_models(rows)
+
+    @_ends_read_transaction
+    def get_year_over_year_changes(
+        self, ticker: str, fact_ids: List[str]
+    ) -> List[Tuple[str, int, int, float]]:
+        """
+        Get year-over-year percentage changes for a company's facts.
+
+        Args:
+            ticker: Company ticker symbol
+            fact_ids: Fact identifiers to compute changes for
 
+        Returns:
+            List of (fact_id, fiscal_year, fiscal_period, percent_change) tuples
+        """
+        return self._repos["fact"].get_year_over_year_changes(ticker, fact_ids)
+
+    @_ends_read_transaction
     def get_fact_values_by_document(self, document_id: str) -> List[FactValue]:
         """
         Get all fact values for a document.
@@ -364,8 +604,9 @@ class UnifiedRepository:
             List of fact values associated with the document
         """
         fact_values = self._repos["fact"].get_fact_values_by_document(document_id)
-        return [self._repos["fact"].fact_value_to_model(fv) for fv in fact_values]
+        return self._repos["fact"].fact_values_to_models(fact_values)
 
+    @_ends_read_transaction
     def get_fact_values_by_fact(
         self, fact_id: str, ticker: str = None, limit: int = 20
     ) -> List[FactValue]:
@@ -383,8 +624,74 @@ class UnifiedRepository:
         fact_values = self._repos["fact"].get_fact_values_by_fact(
             fact_id, ticker, limit
         )
-        return [self._repos["fact"].fact_value_to_model(fv) for fv in fact_values]
+        return self._repos["fact"].fact_values_to_models(fact_values)
+
+    @_ends_read_transaction
+    def get_fact_values_by_facts(
+        self, fact_ids: Iterable[str]
+    ) -> Dict[str, List[FactValue]]:
+        """
+        Get values for several facts with one query per batch of IDs.
+
+        Args:
+            fact_ids: Fact identifiers
+
+        Returns:
+            Dictionary mapping fact IDs to their fact values
+        """
+        grouped = self._repos["fact"].get_fact_values_by_facts(fact_ids)
+        return {
+            fact_id: self._repos["fact"].fact_values_to_models(rows)
+            for fact_id, rows in grouped.items()
+        }
+
+    @_ends_read_transaction
+    def search_facts_by_embedding(
+        self, query_embedding: Union[List[float], np.ndarray], top_k: int = 5
+    ) -> List[Tuple[Fact, float]]:
+        """
+        Search for facts similar to a query embedding.
+
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results to return
 
+        Returns:
+            List of tuples containing (fact, similarity_score)
+        """
+        rows = self._repos["fact"].search_facts_by_embedding(query_embedding, top_k)
+        return [(Fact(**row._mapping), -row.distance) for row in rows]
+
+    async def asearch_facts_by_embeddings(
+        self, query_embeddings: List[List[float]], top_k: int = 5
+    ) -> List[List[Tuple[Fact, float]]]:
+        """
+        Run fact searches for several query embeddings concurrently.
+
+        Each search runs in a worker thread with that thread's own session
+        and pooled connection, so the round trips overlap instead of adding
+        up (at most MAX_CONCURRENT_SEARCHES at a time).
+
+        Args:
+            query_embeddings: Query vectors
+            top_k: Number of results to return per query
+
+        Returns:
+            For each query, in order, tuples containing (fact, similarity_score)
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SEARCHES)
+
+        async def search(query_embedding: List[float]) -> List[Tuple[Fact, float]]:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.search_facts_by_embedding, query_embedding, top_k
+                )
+
+        return await asyncio.gather(
+            *(search(query_embedding) for query_embedding in query_embeddings)
+        )
+
+    @_ends_read_transaction
     def search_facts_by_query(
         self, query: str, top_k: int = 5
     ) -> List[Tuple[Fact, float]]:
@@ -399,38 +706,13 @@ class UnifiedRepository:
             List of tuples containing (fact, similarity_score)
         """
         try:
-            # Get all facts with embeddings
-            facts = self.get_all_facts()
-            facts_with_embeddings = [f for f in facts if f.embedding is not None]
-
-            if not facts_with_embeddings:
-                logger.warning("No facts with embeddings found")
-                return []
-
-            # Get embeddings list
-            embeddings = [f.embedding for f in facts_with_embeddings]
-
-            # Search using fact embedder
-            top_indices = self.fact_embedder.search_facts(query, embeddings, top_k)
-
-            # Get similarities for the top results
-            query_embedding = self.fact_embedder.model.encode(query)
-            similarities = [
-                float(
-                    np.dot(facts_with_embeddings[i].embedding, query_embedding)
-                    / (
-                        np.linalg.norm(facts_with_embeddings[i].embedding)
-                        * np.linalg.norm(query_embedding)
-                    )
-                )
-                for i in top_indices
-            ]
-
-            # Return facts with their similarity scores
-            return [
-                (facts_with_embeddings[i], similarities[j])
-                for j, i in enumerate(top_indices)
-            ]
+            # Rank in Postgres; only the top facts' columns and distances
+            # come back, never the stored embeddings
+            fact_repo = self._repos["fact"]
+            results = fact_repo.search_facts_by_text(
+                query, fact_repo.embedding_service, top_k
+            )
+            return [(Fact(**row._mapping), score) for row, score in results]
         except Exception as e:
             logger.error(f"Error searching facts: {str(e)}")
             return []
@@ -15,6 +15,7 @@ from farsight2.models.models import (
 
 from farsight2.embedding.unified_embedding_service import UnifiedEmbeddingService
 from farsight2.database.unified_repository import UnifiedRepository
+from farsight2.utils import normalize_whitespace
 
 logger = logging.getLogger(__name__)
 
@@ -236,8 +237,9 @@ class DocumentProcessor:
             """Helper to create a text chunk if content is meaningful."""
             nonlocal chunk_id_counter
 
-            # Clean the text
-            text = re.sub(r"\s+", " ", text).strip()
+            # Clean the text; stored as is, so the database write path
+            # does not normalize it again
+            text = normalize_whitespace(text)
 
             # Skip empty or very short chunks
             if not text or len(text) < 50:  # Minimum meaningful chunk size
@@ -578,16 +580,8 @@ class DocumentProcessor:
             parsed_document: Parsed document to save
         """
         try:
-            # Save via the repository
-            self.repository.create_document(parsed_document.metadata)
-
-            # Save text chunks
-            for text_chunk in parsed_document.text_chunks:
-                self.repository.create_text_chunk(text_chunk)
-
-            # Save tables
-            for table in parsed_document.tables:
-                self.repository.create_table(table)
+            # Save the document, text chunks and tables in one transaction
+            self.repository.create_parsed_document(parsed_document)
 
             logger.info(f"Saved document {parsed_document.document_id} to database")
         except Exception as e:
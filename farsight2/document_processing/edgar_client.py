@@ -1,5 +1,6 @@
 """Client for downloading 10-K/10-Q filings from the SEC EDGAR database."""
 
+import asyncio
 import logging
 import requests
 import time
@@ -8,6 +9,8 @@ import os
 import json
 from datetime import datetime
 
+import httpx
+
 from farsight2.utils import generate_document_id
 from farsight2.database.unified_repository import UnifiedRepository
 from farsight2.models.models import DocumentMetadata, Fact, FactValue
@@ -31,6 +34,8 @@ class EdgarClient:
     )
     SUPPORTED_TAXONOMIES = ["us-gaap", "dei", "srt", "ifrs-full"]
     SUPPORTED_UNITS = ["USD", "shares", "pure", "usd-per-shares", "number"]
+    FILINGS_CACHE_TTL = 6 * 60 * 60  # Seconds to reuse a company's filings list
+    MAX_CONNECTIONS = 32  # Connection pool size for the async HTTP client
 
     def __init__(self, download_dir: Optional[str] = None):
         """Initialize the EDGAR client.
@@ -49,6 +54,26 @@ class EdgarClient:
         self.cik_cache = {}
         self._load_cik_cache()
 
+        # Cache for submissions API responses, keyed by ticker: (fetched_at, data)
+        self.filings_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+        # Shared async HTTP client so keep-alive connections are reused
+        self.async_client = httpx.AsyncClient(
+            headers={
+                "User-Agent": self.USER_AGENT,
+                "Accept-Encoding": "gzip, deflate",
+            },
+            limits=httpx.Limits(
+                max_connections=self.MAX_CONNECTIONS,
+                max_keepalive_connections=self.MAX_CONNECTIONS,
+            ),
+        )
+        self._rate_limit_lock = asyncio.Lock()
+
+    async def aclose(self):
+        """Close the async HTTP client and its pooled connections."""
+        await self.async_client.aclose()
+
     def _load_cik_cache(self):
         """Load CIK cache from file if it exists."""
         cache_file = os.path.join(self.download_dir, "cik_cache.json")
@@ -79,13 +104,41 @@ class EdgarClient:
         Returns:
             Dictionary containing company filing information
         """
+        cached = self.filings_cache.get(ticker.upper())
+        if cached and time.monotonic() - cached[0] < self.FILINGS_CACHE_TTL:
+            return cached[1]
+
         cik = self._format_cik(ticker)
         url = f"{self.SUBMISSIONS_URL}/CIK{cik}.json"
         logger.info(f"Fetching company filings from: {url}")
 
         response = self._make_request(url)
-        data = response.json()
+        return self._cache_company_filings(ticker, cik, response.json())
+
+    async def aget_company_filings(self, ticker: str) -> Dict[str, Any]:
+        """Async variant of get_company_filings using the pooled HTTP client.
 
+        Args:
+            ticker: Company ticker symbol
+
+        Returns:
+            Dictionary containing company filing information
+        """
+        cached = self.filings_cache.get(ticker.upper())
+        if cached and time.monotonic() - cached[0] < self.FILINGS_CACHE_TTL:
+            return cached[1]
+
+        cik = await self._aformat_cik(ticker)
+        url = f"{self.SUBMISSIONS_URL}/CIK{cik}.json"
+        logger.info(f"Fetching company filings from: {url}")
+
+        response = await self._amake_request(url)
+        return self._cache_company_filings(ticker, cik, response.json())
+
+    def _cache_company_filings(
+        self, ticker: str, cik: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Cache a submissions API response and the CIK it was fetched with."""
         # Log a simpler message and dump the full data to a file for inspection
         logger.info(f"Fetched company filings for {ticker}")
 
@@ -94,6 +147,7 @@ class EdgarClient:
             self.cik_cache[ticker.upper()] = cik
             self._save_cik_cache()
 
+        self.filings_cache[ticker.upper()] = (time.monotonic(), data)
         return data
 
     def find_filing_url(
@@ -115,7 +169,34 @@ class EdgarClient:
         """
         # Get all filings using the submissions API
         filings_data = self.get_company_filings(ticker)
+        return self._select_filing(
+            filings_data, self._format_cik(ticker), ticker, year, quarter, filing_type
+        )
+
+    async def afind_filing_url(
+        self, ticker: str, year: int, quarter: Optional[int], filing_type: str
+    ) -> Dict[str, Any]:
+        """Async variant of find_filing_url using the pooled HTTP client."""
+        filings_data = await self.aget_company_filings(ticker)
+        return self._select_filing(
+            filings_data,
+            await self._aformat_cik(ticker),
+            ticker,
+            year,
+            quarter,
+            filing_type,
+        )
 
+    def _select_filing(
+        self,
+        filings_data: Dict[str, Any],
+        cik: str,
+        ticker: str,
+        year: int,
+        quarter: Optional[int],
+        filing_type: str,
+    ) -> Dict[str, Any]:
+        """Pick the newest matching filing from a submissions API response."""
         # Extract the recent filings from the data
         recent_filings = filings_data.get("filings", {}).get("recent", {})
         if not recent_filings:
@@ -163,7 +244,6 @@ class EdgarClient:
         accession_number_clean = accession_number.replace("-", "")
 
         # Create the URL for the filing
-        cik = self._format_cik(ticker)
         url = f"{self.ARCHIVE_URL}/edgar/data/{int(cik)}/{accession_number_clean}/{accession_number}.txt"
         xbrl_url = f"{self.XBRL_URL.format(cik=cik)}"
         return {
@@ -200,29 +280,17 @@ class EdgarClient:
             )
 
             fill_url_data = self.find_filing_url(ticker, year, quarter, filing_type)
-            filing_url = fill_url_data["url"]
-            filing_date = fill_url_data["filing_date"]
             # Download the index page
-            index_response = self._make_request(filing_url)
-
-            # Parse the index page to find the actual document URL
-            from bs4 import BeautifulSoup
-
-            soup = BeautifulSoup(index_response.content, "html.parser")
-
-            return {
-                "content": soup.prettify(),
-                "metadata": DocumentMetadata(
-                    document_id=generate_document_id(
-                        ticker, year, quarter, filing_type
-                    ),
-                    ticker=ticker,
-                    year=year,
-                    quarter=quarter,
-                    filing_type=filing_type,
-                    filing_date=filing_date,
-                ),
-            }
+            index_response = self._make_request(fill_url_data["url"])
+
+            return self._build_filing_result(
+                index_response.content,
+                fill_url_data["filing_date"],
+                ticker,
+                year,
+                quarter,
+                filing_type,
+            )
 
         except Exception as e:
             import traceback
@@ -232,6 +300,70 @@ class EdgarClient:
             )
             raise
 
+    async def adownload_filing(
+        self, ticker: str, year: int, quarter: Optional[int], filing_type: str
+    ) -> Dict[str, Any]:
+        """Async variant of download_filing using the pooled HTTP client.
+
+        The filing is fetched without blocking the event loop; HTML parsing
+        runs in a worker thread.
+        """
+        try:
+            logger.info(
+                f"Searching for {filing_type} filing for {ticker} {year}"
+                + (f" Q{quarter}" if quarter else "")
+            )
+
+            fill_url_data = await self.afind_filing_url(
+                ticker, year, quarter, filing_type
+            )
+            index_response = await self._amake_request(fill_url_data["url"])
+
+            return await asyncio.to_thread(
+                self._build_filing_result,
+                index_response.content,
+                fill_url_data["filing_date"],
+                ticker,
+                year,
+                quarter,
+                filing_type,
+            )
+
+        except Exception as e:
+            import traceback
+
+            logger.exception(
+                f"Error downloading filing: {str(e)} {traceback.format_exc()}"
+            )
+            raise
+
+    def _build_filing_result(
+        self,
+        content: bytes,
+        filing_date: datetime,
+        ticker: str,
+        year: int,
+        quarter: Optional[int],
+        filing_type: str,
+    ) -> Dict[str, Any]:
+        """Parse a downloaded filing and attach its metadata."""
+        # Parse the index page to find the actual document URL
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(content, "html.parser")
+
+        return {
+            "content": soup.prettify(),
+            "metadata": DocumentMetadata(
+                document_id=generate_document_id(ticker, year, quarter, filing_type),
+                ticker=ticker,
+                year=year,
+                quarter=quarter,
+                filing_type=filing_type,
+                filing_date=filing_date,
+            ),
+        }
+
     def _format_cik(self, ticker: str) -> str:
         """
         Format CIK number with leading zeros to 10 digits.
@@ -253,33 +385,48 @@ class EdgarClient:
         try:
             # Use the company_tickers.json endpoint to get CIK numbers
             response = self._make_request(self.TICKER_LOOKUP_URL)
-            data = response.json()
-
-            # The API returns a dict where keys are indices and values are company info
-            for _, company in data.items():
-                if company.get("ticker", "").upper() == ticker.upper():
-                    cik = str(company.get("cik_str", ""))
-                    logger.info(f"Found CIK {cik} for ticker {ticker}")
-
-                    # Format with leading zeros to 10 digits
-                    formatted_cik = cik.zfill(10)
+            return self._cik_from_ticker_lookup(ticker, response.json())
 
-                    # Cache the result
-                    self.cik_cache[ticker.upper()] = formatted_cik
-                    self._save_cik_cache()
+        except Exception as e:
+            logger.exception(f"Error looking up CIK for ticker {ticker}: {str(e)}")
+            raise Exception(f"Error looking up CIK for ticker {ticker}: {str(e)}")
 
-                    return formatted_cik
+    async def _aformat_cik(self, ticker: str) -> str:
+        """Async variant of _format_cik using the pooled HTTP client."""
+        if ticker.upper() in self.cik_cache:
+            return self.cik_cache[ticker.upper()]
 
-            # If ticker not found, try the submissions API
-            logger.warning(
-                f"CIK not found for ticker {ticker} in company_tickers.json, trying full text search"
-            )
-            raise Exception(f"CIK not found for ticker {ticker}")
+        try:
+            response = await self._amake_request(self.TICKER_LOOKUP_URL)
+            return self._cik_from_ticker_lookup(ticker, response.json())
 
         except Exception as e:
             logger.exception(f"Error looking up CIK for ticker {ticker}: {str(e)}")
             raise Exception(f"Error looking up CIK for ticker {ticker}: {str(e)}")
 
+    def _cik_from_ticker_lookup(self, ticker: str, data: Dict[str, Any]) -> str:
+        """Find and cache a ticker's CIK in the company_tickers.json response."""
+        # The API returns a dict where keys are indices and values are company info
+        for _, company in data.items():
+            if company.get("ticker", "").upper() == ticker.upper():
+                cik = str(company.get("cik_str", ""))
+                logger.info(f"Found CIK {cik} for ticker {ticker}")
+
+                # Format with leading zeros to 10 digits
+                formatted_cik = cik.zfill(10)
+
+                # Cache the result
+                self.cik_cache[ticker.upper()] = formatted_cik
+                self._save_cik_cache()
+
+                return formatted_cik
+
+        # If ticker not found, try the submissions API
+        logger.warning(
+            f"CIK not found for ticker {ticker} in company_tickers.json, trying full text search"
+        )
+        raise Exception(f"CIK not found for ticker {ticker}")
+
     def _make_request(self, url: str) -> requests.Response:
         """Make a request to the SEC EDGAR API with appropriate headers and rate limiting."""
         headers = {
@@ -296,6 +443,17 @@ class EdgarClient:
 
         return response
 
+    async def _amake_request(self, url: str) -> httpx.Response:
+        """Make a request to the SEC EDGAR API with the pooled async client."""
+        # Rate limiting - SEC recommends no more than 10 requests per second
+        async with self._rate_limit_lock:
+            await asyncio.sleep(0.1)
+
+        response = await self.async_client.get(url)
+        response.raise_for_status()
+
+        return response
+
     def get_xbrl_facts_url(self, ticker: str) -> requests.Response:
         """
         Get the XBRL facts from the SEC API.
@@ -408,7 +566,7 @@ class EdgarClient:
                                 # filed_date = value.get("filed", "")
                                 form = value.get("form", "")
                                 accn = value.get("accn", "")
-                                fy = value.get("fy", 0)
+                                fy = value.get("fy") or 0
                                 fp = value.get("fp", "")
                                 if fp == "FY":
                                     fp = None
@@ -499,7 +657,7 @@ class EdgarClient:
         Save XBRL fact values to the database.
 
         This method stores the actual financial data points extracted from XBRL data.
-        It performs duplicate checking based on the fact ID, document, and dates.
+        It performs duplicate checking based on the fact ID and document.
 
         Args:
             ticker: Company ticker symbol
@@ -511,29 +669,25 @@ class EdgarClient:
         saved_count = 0
         skipped_count = 0
         error_count = 0
+        new_values = []
 
+        # Look up the stored values once and check duplicates against a set,
+        # including duplicates within this batch
+        existing_keys = self.repository.get_fact_value_keys(ticker)
         for fact_value in fact_values:
-            try:
-                # Check if this fact value already exists
-                # Note: A proper implementation would check for duplicates more thoroughly
-                existing_value = self.repository.get_fact_value_by_details(
-                    fact_value.fact_id,
-                    fact_value.ticker,
-                    fact_value.fiscal_year,
-                    fact_value.fiscal_period,
-                    fact_value.filing_type,
-                )
-
-                if not existing_value:
-                    self.repository.create_fact_value(fact_value)
-                    saved_count += 1
-                else:
-                    skipped_count += 1
-            except Exception as e:
-                logger.error(
-                    f"Error saving fact value for {fact_value.fact_id}: {str(e)}"
-                )
-                error_count += 1
+            key = (fact_value.fact_id, fact_value.document_id)
+            if key in existing_keys:
+                skipped_count += 1
+            else:
+                existing_keys.add(key)
+                new_values.append(fact_value)
+
+        # Stream all new values with COPY in one transaction
+        try:
+            saved_count = self.repository.copy_fact_values(new_values)
+        except Exception as e:
+            logger.error(f"Error saving fact values for {ticker}: {str(e)}")
+            error_count += len(new_values)
 
         logger.info(
             f"Fact values for {ticker}: saved {saved_count}, skipped {skipped_count}, errors {error_count}"
@@ -586,42 +740,23 @@ class EdgarClient:
             # Get all fact values for this ticker
             fact_values = self.repository.get_fact_values_by_ticker(ticker)
 
-            # Group by fact ID and sort by date
+            # Group by fact ID
             fact_value_groups = {}
             for fv in fact_values:
                 if fv.fact_id not in fact_value_groups:
                     fact_value_groups[fv.fact_id] = []
                 fact_value_groups[fv.fact_id].append(fv)
 
-            # Sort each group by fiscal year and period
-            for fact_id, values in fact_value_groups.items():
-                fact_value_groups[fact_id] = sorted(
-                    values,
-                    key=lambda fv: (
-                        fv.fiscal_year,
-                        self._fiscal_period_to_number(fv.fiscal_period),
-                    ),
-                )
-
-            # Calculate year-over-year growth rates for key metrics
+            # Calculate year-over-year growth rates for key metrics in the database
             key_metrics = ["us-gaap:Revenue", "us-gaap:NetIncome", "us-gaap:Assets"]
-            for metric in key_metrics:
-                if metric in fact_value_groups and len(fact_value_groups[metric]) >= 2:
-                    values = fact_value_groups[metric]
-
-                    # Calculate YoY growth
-                    for i in range(1, len(values)):
-                        if (
-                            values[i - 1].value != 0
-                            and values[i].fiscal_period == values[i - 1].fiscal_period
-                        ):
-                            yoy_change = (
-                                (values[i].value - values[i - 1].value)
-                                / abs(values[i - 1].value)
-                                * 100
-                            )
-                            key = f"{metric}_YoY_{values[i].fiscal_year}_{values[i].fiscal_period}"
-                            derived_metrics[key] = yoy_change
+            for (
+                metric,
+                fiscal_year,
+                fiscal_period,
+                yoy_change,
+            ) in self.repository.get_year_over_year_changes(ticker, key_metrics):
+                key = f"{metric}_YoY_{fiscal_year}_{fiscal_period}"
+                derived_metrics[key] = yoy_change
 
             # Calculate key financial ratios
             revenue_values = fact_value_groups.get("us-gaap:Revenue", [])
@@ -647,17 +782,6 @@ class EdgarClient:
             logger.error(f"Error calculating derived metrics for {ticker}: {str(e)}")
             return {}
 
-    def _fiscal_period_to_number(self, fp: str) -> int:
-        """Convert fiscal period to a numeric value for sorting."""
-        if fp == "FY":
-            return 5
-        elif fp.startswith("Q") and len(fp) > 1:
-            try:
-                return int(fp[1:])
-            except:
-                return 0
-        return 0
-
     def find_xbrl_fact_locations(self, ticker, document_id):
         """Locate XBRL facts in the document by parsing the iXBRL content."""
         # Get the document content
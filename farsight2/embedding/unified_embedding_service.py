@@ -5,12 +5,13 @@ This module combines functionality from the Embedder and VectorStore classes
 to provide a streamlined API for working with embeddings.
 """
 
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 from typing import List, Dict, Any, Optional, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from farsight2.models.models import (
     DocumentChunk,
@@ -33,6 +34,13 @@ class UnifiedEmbeddingService:
     to provide a streamlined API for working with embeddings.
     """
 
+    # Maximum number of in-flight embedding requests for the async methods
+    MAX_CONCURRENT_EMBEDDINGS = 16
+
+    # Limits for a single batched embedding request
+    EMBEDDING_BATCH_SIZE = 100
+    EMBEDDING_BATCH_MAX_TOKENS = 250_000
+
     def __init__(self, api_key: Optional[str] = None, repository=None):
         """
         Initialize the unified embedding service.
@@ -47,6 +55,7 @@ class UnifiedEmbeddingService:
             raise ValueError("OpenAI API key is required")
 
         self.client = OpenAI(api_key=self.api_key)
+        self.async_client = AsyncOpenAI(api_key=self.api_key)
         self.repository = repository
         self.response_model = CHAT_MODEL
 
@@ -102,6 +111,70 @@ class UnifiedEmbeddingService:
 
         return embedded_facts
 
+    async def aembed_fact(self, fact: Fact) -> List[float]:
+        """
+        Asynchronously generate an embedding for a fact.
+
+        Args:
+            fact: Fact model containing label and description
+
+        Returns:
+            Vector embedding as a list of floats
+        """
+        text = f"{fact.label} {fact.description}"
+        return await self.agenerate_embedding(text)
+
+    async def aembed_facts(self, facts: List[Fact]) -> List[Fact]:
+        """
+        Generate embeddings for a list of facts, requesting them concurrently.
+
+        Facts already stored with an embedding are found with one query and
+        skipped; the new embeddings are stored with one bulk upsert. Database
+        calls run in worker threads so they do not block the event loop.
+
+        Args:
+            facts: List of facts to embed
+
+        Returns:
+            List of facts with embeddings added
+        """
+        logger.info(f"Generating embeddings for {len(facts)} facts")
+
+        try:
+            existing = await asyncio.to_thread(
+                self.repository.get_embedded_fact_ids,
+                [fact.fact_id for fact in facts],
+            )
+        except Exception as e:
+            logger.error(f"Error looking up existing facts: {e}")
+            return []
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_EMBEDDINGS)
+
+        async def embed_single_fact(fact):
+            if fact.fact_id in existing:
+                logger.info(f"Fact already exists: {fact.fact_id}")
+                return fact
+            try:
+                async with semaphore:
+                    fact.embedding = await self.aembed_fact(fact)
+                return fact
+            except Exception as e:
+                logger.error(f"Error embedding fact {fact.fact_id}: {e}")
+                return None
+
+        results = await asyncio.gather(*(embed_single_fact(fact) for fact in facts))
+
+        # Filter out None values (failed embeddings)
+        embedded_facts = [fact for fact in results if fact is not None]
+        new_facts = [fact for fact in embedded_facts if fact.fact_id not in existing]
+        try:
+            await asyncio.to_thread(self.repository.create_facts, new_facts)
+        except Exception as e:
+            logger.error(f"Error storing fact embeddings: {e}")
+            return [fact for fact in embedded_facts if fact.fact_id in existing]
+        return embedded_facts
+
     def search_facts(self, query: str, top_k: int = 5) -> List[Tuple[Fact, float]]:
         """
         Search for facts using semantic similarity to a query.
@@ -142,17 +215,52 @@ class UnifiedEmbeddingService:
         # Convert document chunks to a format suitable for embedding
         document_chunks = self._convert_to_document_chunks(parsed_document)
 
-        # Generate embeddings and store in database
-        embedded_chunks = []
-        for chunk in document_chunks:
-            embedding = self.generate_embedding(chunk.content)
+        # Generate embeddings, then store all chunks and embeddings in bulk
+        # in one transaction
+        embeddings = [
+            self.generate_embedding(chunk.content) for chunk in document_chunks
+        ]
+        self.repository.create_content_chunks(document_chunks, embeddings)
+        embedded_chunks = [
+            EmbeddedChunk(chunk=chunk, embedding=embedding)
+            for chunk, embedding in zip(document_chunks, embeddings)
+        ]
 
-            # Store the chunk and embedding in the database
-            self.repository.create_content_chunk(chunk, embedding)
+        logger.info(
+            f"Created {len(embedded_chunks)} embeddings for document {parsed_document.document_id}"
+        )
+        return embedded_chunks
 
-            # Create embedded chunk object for return value
-            embedded_chunk = EmbeddedChunk(chunk=chunk, embedding=embedding)
-            embedded_chunks.append(embedded_chunk)
+    async def aembed_document(
+        self, parsed_document: ParsedDocument
+    ) -> List[EmbeddedChunk]:
+        """
+        Asynchronously generate and store embeddings for all chunks in a document.
+
+        Chunks are embedded in concurrent micro-batches; the chunks and
+        embeddings are then bulk-loaded into the database in one transaction.
+
+        Args:
+            parsed_document: Parsed document to embed
+
+        Returns:
+            List of embedded chunks
+        """
+        logger.info(f"Embedding document: {parsed_document.document_id}")
+
+        document_chunks = self._convert_to_document_chunks(parsed_document)
+
+        embeddings = await self.agenerate_embeddings(
+            [chunk.content for chunk in document_chunks]
+        )
+
+        await asyncio.to_thread(
+            self.repository.create_content_chunks, document_chunks, embeddings
+        )
+        embedded_chunks = [
+            EmbeddedChunk(chunk=chunk, embedding=embedding)
+            for chunk, embedding in zip(document_chunks, embeddings)
+        ]
 
         logger.info(
             f"Created {len(embedded_chunks)} embeddings for document {parsed_document.document_id}"
@@ -173,24 +281,109 @@ class UnifiedEmbeddingService:
             Exception: If embedding generation fails
         """
         try:
-            # Truncate text if it's too long (model dependent)
-            max_tokens = 8192
-            if len(text) > max_tokens * 5:  # Rough estimation of tokens
-                logger.warning(
-                    f"Text too long ({len(text)} chars), truncating to ~{max_tokens} tokens"
-                )
-                text = text[: max_tokens * 5]
-
             # Generate embedding via OpenAI API
             response = self.client.embeddings.create(
-                model=self.embedding_model, input=text
+                model=self.embedding_model, input=self._truncate_text(text)
+            )
+            return response.data[0].embedding
+
+        except Exception as e:
+            logger.error(f"Error generating embedding: {e}")
+            # Return a zero vector as a fallback
+            return self._zero_embedding()
+
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        """
+        Asynchronously generate an embedding for text using OpenAI's API.
+
+        Args:
+            text: Text to generate embedding for
+
+        Returns:
+            List of floats representing the embedding vector
+        """
+        try:
+            response = await self.async_client.embeddings.create(
+                model=self.embedding_model, input=self._truncate_text(text)
             )
             return response.data[0].embedding
 
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             # Return a zero vector as a fallback
-            return [0.0] * (3072 if "3-small" in self.embedding_model else 3072)
+            return self._zero_embedding()
+
+    async def agenerate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Asynchronously generate embeddings for many texts using batched requests.
+
+        Texts are sorted by length and packed into batches bounded by
+        EMBEDDING_BATCH_SIZE inputs and EMBEDDING_BATCH_MAX_TOKENS tokens.
+        Batches are sent concurrently (up to MAX_CONCURRENT_EMBEDDINGS at a time).
+
+        Args:
+            texts: Texts to generate embeddings for
+
+        Returns:
+            Embeddings in the same order as the input texts
+        """
+        truncated = [self._truncate_text(text) for text in texts]
+
+        # Pack similarly sized texts together, remembering original positions
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for index in sorted(range(len(truncated)), key=lambda i: len(truncated[i])):
+            tokens = self._estimate_tokens(truncated[index])
+            if batch and (
+                len(batch) >= self.EMBEDDING_BATCH_SIZE
+                or batch_tokens + tokens > self.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+
+        embeddings: List[List[float]] = [[] for _ in truncated]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_EMBEDDINGS)
+
+        async def embed_batch(indices: List[int]) -> None:
+            try:
+                async with semaphore:
+                    response = await self.async_client.embeddings.create(
+                        model=self.embedding_model,
+                        input=[truncated[i] for i in indices],
+                    )
+                for item in response.data:
+                    embeddings[indices[item.index]] = item.embedding
+            except Exception as e:
+                logger.error(f"Error generating embeddings for batch: {e}")
+                # Return zero vectors as a fallback
+                for i in indices:
+                    embeddings[i] = self._zero_embedding()
+
+        await asyncio.gather(*(embed_batch(indices) for indices in batches))
+        return embeddings
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Roughly estimate the number of tokens in a text."""
+        return len(text) // 4 + 1
+
+    def _truncate_text(self, text: str) -> str:
+        """Truncate text if it's too long for the embedding model."""
+        max_tokens = 8192
+        if len(text) > max_tokens * 5:  # Rough estimation of tokens
+            logger.warning(
+                f"Text too long ({len(text)} chars), truncating to ~{max_tokens} tokens"
+            )
+            text = text[: max_tokens * 5]
+        return text
+
+    def _zero_embedding(self) -> List[float]:
+        """Zero vector used as a fallback when embedding generation fails."""
+        return [0.0] * (3072 if "3-small" in self.embedding_model else 3072)
 
     def search(
         self, query: str, top_k: int = 5, filter_dict: Optional[Dict[str, Any]] = None
@@ -14,6 +14,7 @@ import sys
 
 from farsight2.api.app import ProcessDocumentRequest, app, process_document
 from farsight2.database.db import init_db
+from farsight2.models.models import FilingType
 
 # Configure logging
 logging.basicConfig(
@@ -40,7 +41,7 @@ def run_api():
 
 def init_database():
     """Initialize the database schema and tables."""
-    init_db()
+    init_db(migrate=True)
     logger.info("Database initialized")
 
 
@@ -48,7 +49,7 @@ async def generate_test_suite():
     for ticker in ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA"]:
         for year in range(2020, 2024):
             for quarter in range(1, 5):
-                for filing_type in ["10K", "10Q"]:
+                for filing_type in FilingType:
                     await process_document(
                         ProcessDocumentRequest(
                             ticker=ticker,
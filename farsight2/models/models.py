@@ -3,11 +3,20 @@
 # They are not used in the database.
 
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
-from pydantic import BaseModel, Field
+from enum import StrEnum
+from typing import Any, Dict, List, Literal, Optional, Union
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import uuid4
 
 
+class FilingType(StrEnum):
+    """SEC filing types supported by the system."""
+
+    TEN_K = "10-K"
+    TEN_Q = "10-Q"
+
+
 class Company(BaseModel):
     """Represents a company."""
 
@@ -78,8 +87,12 @@ class DocumentChunk(BaseModel):
 class EmbeddedChunk(BaseModel):
     """A document chunk with its embedding."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     chunk: DocumentChunk = Field(..., description="Document chunk")
-    embedding: List[float] = Field(..., description="Vector embedding")
+    embedding: Union[List[float], np.ndarray] = Field(
+        ..., description="Vector embedding"
+    )
 
 
 class QueryAnalysis(BaseModel):
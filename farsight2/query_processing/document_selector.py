@@ -5,7 +5,7 @@ from typing import List
 from datetime import datetime
 
 
-from farsight2.models.models import QueryAnalysis, DocumentReference
+from farsight2.models.models import DocumentReference, FilingType, QueryAnalysis
 
 logger = logging.getLogger(__name__)
 
@@ -53,12 +53,13 @@ class DocumentSelector:
             current_year = datetime.now().year
             years = [current_year]
 
+        # Get the documents of all companies in one query
+        documents_by_company = self.repository.get_documents_by_companies(companies)
+
         # For each company, find the relevant documents
         for company in companies:
-            # Check if we have documents for this company
-
             # Get all documents for this company
-            company_documents = self.repository.get_documents_by_company(company)
+            company_documents = documents_by_company.get(company, [])
 
             print(f"Company documents: {company_documents}")
 
@@ -68,7 +69,7 @@ class DocumentSelector:
                 annual_docs = [
                     doc
                     for doc in company_documents
-                    if doc.year == year and doc.filing_type == "10-K"
+                    if doc.year == year and doc.filing_type == FilingType.TEN_K
                 ]
 
                 # Add annual report with high relevance
@@ -93,7 +94,7 @@ class DocumentSelector:
                             doc
                             for doc in company_documents
                             if doc.year == year
-                            and doc.filing_type == "10-Q"
+                            and doc.filing_type == FilingType.TEN_Q
                             and doc.quarter == quarter
                         ]
 
@@ -110,7 +111,7 @@ class DocumentSelector:
                     quarterly_docs = [
                         doc
                         for doc in company_documents
-                        if doc.year == year and doc.filing_type == "10-Q"
+                        if doc.year == year and doc.filing_type == FilingType.TEN_Q
                     ]
 
                     # Add quarterly reports with medium relevance
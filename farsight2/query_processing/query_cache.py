@@ -0,0 +1,166 @@
+"""Semantic cache for reusing results computed for similar queries."""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """In-process cache of query results keyed on the query embedding.
+
+    A lookup is a hit when the cosine similarity between the query embedding
+    and a stored embedding reaches the similarity threshold, so paraphrased
+    questions can reuse a previous answer or search result. Entries can also
+    carry a scope (e.g. the companies and years a query asks about) that must
+    match exactly, since queries differing only in those embed almost
+    identically.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.97,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024,
+    ):
+        """Initialize the query cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            ttl_seconds: Time in seconds before a cached response expires
+            max_entries: Maximum number of cached results
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # Preallocated float32 matrix of unit-normalized embeddings. Live rows
+        # are _buffer[_start:_start + len(_responses)], in insertion order.
+        self._buffer: Optional[np.ndarray] = None
+        self._start = 0
+        self._responses: List[Any] = []
+        self._scopes: List[Hashable] = []
+        self._timestamps: List[float] = []
+        self._lock = threading.Lock()
+
+    def get(
+        self, embedding: Optional[List[float]], scope: Hashable = None
+    ) -> Optional[Any]:
+        """Get the cached response for the most similar query.
+
+        Args:
+            embedding: Query embedding
+            scope: Key that a cached entry must match exactly to be a hit
+
+        Returns:
+            Cached response if a similar enough query was found, None otherwise
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+
+        with self._lock:
+            self._evict_expired()
+            if not self._responses:
+                return None
+
+            similarities = self._live_embeddings() @ vector
+            in_scope = np.fromiter(
+                (entry_scope == scope for entry_scope in self._scopes),
+                dtype=bool,
+                count=len(self._scopes),
+            )
+            similarities[~in_scope] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+
+            logger.info(f"Query cache hit (similarity={similarities[best]:.4f})")
+            return self._responses[best]
+
+    def put(
+        self, embedding: Optional[List[float]], response: Any, scope: Hashable = None
+    ) -> None:
+        """Store a response for a query embedding.
+
+        Args:
+            embedding: Query embedding
+            response: Response to cache
+            scope: Key that later lookups must match exactly to reuse it
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            self._evict_expired()
+            if len(self._responses) >= self.max_entries:
+                self._drop_oldest(len(self._responses) - self.max_entries + 1)
+
+            self._reserve_row(vector.shape[0])
+            self._buffer[self._start + len(self._responses)] = vector
+            self._responses.append(response)
+            self._scopes.append(scope)
+            self._timestamps.append(time.monotonic())
+
+    def clear(self) -> None:
+        """Drop every cached entry, e.g. after new data has been ingested."""
+        with self._lock:
+            self._drop_oldest(len(self._responses))
+
+    def _live_embeddings(self) -> np.ndarray:
+        """Get a view of the stored embeddings, oldest first."""
+        return self._buffer[self._start : self._start + len(self._responses)]
+
+    def _reserve_row(self, dimensions: int) -> None:
+        """Make room for one more row at the end of the buffer.
+
+        Live rows are compacted to the front, and the buffer is doubled when
+        it is more than half full, so appends are amortized O(1) instead of
+        copying the whole matrix on every put.
+        """
+        count = len(self._responses)
+        if self._buffer is None or self._buffer.shape[1] != dimensions:
+            self._buffer = np.empty((16, dimensions), dtype=np.float32)
+            self._start = 0
+            return
+        if self._start + count < len(self._buffer):
+            return
+
+        live = self._live_embeddings()
+        if 2 * count >= len(self._buffer):
+            self._buffer = np.empty(
+                (2 * len(self._buffer), dimensions), dtype=np.float32
+            )
+        self._buffer[:count] = live
+        self._start = 0
+
+    def _evict_expired(self) -> None:
+        """Drop entries older than the TTL. Entries are stored oldest first."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        self._drop_oldest(bisect.bisect_left(self._timestamps, cutoff))
+
+    def _drop_oldest(self, count: int) -> None:
+        """Drop the given number of oldest entries."""
+        if count <= 0:
+            return
+        self._start += count
+        del self._responses[:count]
+        del self._scopes[:count]
+        del self._timestamps[:count]
+
+    @staticmethod
+    def _normalize(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit vector, or None if it has no direction."""
+        if not embedding:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
@@ -1,12 +1,24 @@
+import re
+import sys
+from functools import lru_cache
 from typing import Optional
 
+# Filing type codes used in document IDs
+_FILING_TYPE_CODES = {"10-K": "10K", "10-Q": "10Q"}
 
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=65536)
 def generate_document_id(
     ticker: str, year: int, quarter: Optional[int], filing_type: str
 ) -> str:
     """
     Generate a standardized document ID from document metadata.
 
+    IDs are cached and interned, so repeated calls return the same string
+    object and compare by identity in dict and set lookups.
+
     Args:
         ticker: Company ticker symbol
         year: Filing year
@@ -16,6 +28,18 @@ def generate_document_id(
     Returns:
         Formatted document ID string
     """
-    return (
-        f"{ticker}_{year}_{quarter if quarter else '4'}_{filing_type.replace('-', '')}"
-    )
+    filing_code = _FILING_TYPE_CODES.get(filing_type) or filing_type.replace("-", "")
+    return sys.intern(f"{ticker}_{year}_{quarter if quarter else '4'}_{filing_code}")
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace into single spaces and trim the ends.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE.sub(" ", text).strip()
@@ -0,0 +1,99 @@
+"""Tests for the semantic query cache."""
+
+import pytest
+
+from farsight2.query_processing import query_cache
+from farsight2.query_processing.query_cache import QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(query_cache.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+class TestQueryCache:
+    def test_hit_on_similar_embedding(self):
+        cache = QueryCache(similarity_threshold=0.97)
+        cache.put([1.0, 0.0, 0.0], "answer")
+        assert cache.get([1.0, 0.01, 0.0]) == "answer"
+
+    def test_miss_below_threshold(self):
+        cache = QueryCache(similarity_threshold=0.97)
+        cache.put([1.0, 0.0, 0.0], "answer")
+        assert cache.get([1.0, 1.0, 0.0]) is None
+
+    def test_returns_most_similar(self):
+        cache = QueryCache(similarity_threshold=0.9)
+        cache.put([1.0, 0.2, 0.0], "farther")
+        cache.put([1.0, 0.05, 0.0], "nearer")
+        assert cache.get([1.0, 0.0, 0.0]) == "nearer"
+
+    def test_empty_and_zero_embeddings(self):
+        cache = QueryCache()
+        cache.put(None, "none")
+        cache.put([0.0, 0.0], "zero")
+        assert cache.get([0.0, 0.0]) is None
+        assert cache.get([1.0, 0.0]) is None
+
+    def test_scope_hit(self):
+        cache = QueryCache()
+        scope = (frozenset({"AAPL"}), frozenset({2023}), frozenset())
+        cache.put([1.0, 0.0], "2023 answer", scope)
+        assert cache.get([1.0, 0.0], scope) == "2023 answer"
+
+    def test_scope_miss_across_years(self):
+        cache = QueryCache()
+        cache.put([1.0, 0.0], "2022 answer", (frozenset({"AAPL"}), frozenset({2022})))
+        assert cache.get([1.0, 0.0], (frozenset({"AAPL"}), frozenset({2023}))) is None
+        assert cache.get([1.0, 0.0]) is None
+
+    def test_scope_picks_matching_entry(self):
+        cache = QueryCache()
+        cache.put([1.0, 0.0], "AAPL answer", frozenset({"AAPL"}))
+        cache.put([1.0, 0.0], "MSFT answer", frozenset({"MSFT"}))
+        assert cache.get([1.0, 0.0], frozenset({"AAPL"})) == "AAPL answer"
+        assert cache.get([1.0, 0.0], frozenset({"MSFT"})) == "MSFT answer"
+
+    def test_clear(self):
+        cache = QueryCache()
+        cache.put([1.0, 0.0], "answer")
+        cache.clear()
+        assert cache.get([1.0, 0.0]) is None
+        cache.put([1.0, 0.0], "new answer")
+        assert cache.get([1.0, 0.0]) == "new answer"
+
+    def test_ttl(self, clock):
+        cache = QueryCache(ttl_seconds=60)
+        cache.put([1.0, 0.0], "old")
+        clock.now += 30
+        cache.put([0.0, 1.0], "new")
+        assert cache.get([1.0, 0.0]) == "old"
+        clock.now += 31
+        assert cache.get([1.0, 0.0]) is None
+        assert cache.get([0.0, 1.0]) == "new"
+
+    def test_evicts_oldest_at_capacity(self):
+        cache = QueryCache(max_entries=2)
+        cache.put([1.0, 0.0, 0.0], "first")
+        cache.put([0.0, 1.0, 0.0], "second")
+        cache.put([0.0, 0.0, 1.0], "third")
+        assert cache.get([1.0, 0.0, 0.0]) is None
+        assert cache.get([0.0, 1.0, 0.0]) == "second"
+        assert cache.get([0.0, 0.0, 1.0]) == "third"
+
+    def test_buffer_growth_keeps_entries(self):
+        cache = QueryCache(max_entries=100)
+        vectors = [[float(i == j) for j in range(40)] for i in range(40)]
+        for i, vector in enumerate(vectors):
+            cache.put(vector, i)
+        assert [cache.get(vector) for vector in vectors] == list(range(40))
@@ -0,0 +1,378 @@
+"""Tests for the repository, on SQLite or against compiled PostgreSQL SQL."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from farsight2.database import repository
+from farsight2.database.db import Base
+from farsight2.database.models import Company, Document, FactValue
+from farsight2.database.repository import (
+    FACT_VALUE_FIELDS,
+    FOREIGN_KEY_VIOLATION,
+    UNKNOWN_FISCAL_YEAR,
+    DocumentRepository,
+    EmbeddingRepository,
+    FactRepository,
+)
+from farsight2.models.models import (
+    DocumentChunk as DocumentChunkModel,
+    EmbeddedChunk,
+    FactValue as FactValueModel,
+)
+
+# fact_values' composite autoincrement key cannot be created by SQLite from
+# the model, so the test table is declared by hand with the same columns
+FACT_VALUES_DDL = """
+CREATE TABLE fact_values (
+    id INTEGER NOT NULL,
+    fact_id VARCHAR,
+    ticker VARCHAR,
+    value FLOAT,
+    document_id VARCHAR,
+    filing_type VARCHAR,
+    accession_number VARCHAR,
+    start_date VARCHAR,
+    end_date VARCHAR,
+    fiscal_year INTEGER NOT NULL,
+    fiscal_period SMALLINT,
+    unit VARCHAR,
+    decimals INTEGER,
+    form VARCHAR,
+    PRIMARY KEY (id, fiscal_year)
+)
+"""
+
+
+@pytest.fixture
+def fact_repo():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(FACT_VALUES_DDL))
+    with Session(engine) as session:
+        session.add_all(
+            [
+                FactValue(
+                    id=1, fact_id="us-gaap:Revenues", value=10.0, fiscal_year=2022
+                ),
+                FactValue(
+                    id=2, fact_id="us-gaap:Revenues", value=12.0, fiscal_year=2023
+                ),
+            ]
+        )
+        session.commit()
+        session.expunge_all()
+        yield FactRepository(session)
+
+
+class TestGetFactValue:
+    def test_by_id(self, fact_repo):
+        fact_value = fact_repo.get_fact_value(2)
+        assert fact_value.value == 12.0
+        assert fact_value.fiscal_year == 2023
+
+    def test_by_string_id(self, fact_repo):
+        assert fact_repo.get_fact_value("1").value == 10.0
+
+    def test_by_id_and_fiscal_year(self, fact_repo):
+        assert fact_repo.get_fact_value(1, fiscal_year=2022).value == 10.0
+        assert fact_repo.get_fact_value(1, fiscal_year=2023) is None
+
+    def test_missing(self, fact_repo):
+        assert fact_repo.get_fact_value(3) is None
+
+    def test_to_model(self, fact_repo):
+        model = fact_repo.fact_value_to_model(fact_repo.get_fact_value(1))
+        assert model.fact_id == "us-gaap:Revenues"
+        assert model.fiscal_year == 2022
+
+
+class TestCreateFactValue:
+    def test_missing_fiscal_year_is_stored_as_unknown(self, recording_session):
+        FactRepository(recording_session).create_fact_value(
+            FactValueModel(fact_id="us-gaap:Revenues", value=1.0)
+        )
+        [(sql, params)] = recording_session.statements
+        assert params["fiscal_year"] == UNKNOWN_FISCAL_YEAR
+        assert "ON CONFLICT (fact_id, document_id, fiscal_year) DO UPDATE" in sql
+
+    def test_key_treats_missing_documents_as_equal(self):
+        [index] = [
+            index
+            for index in FactValue.__table__.indexes
+            if index.name == "ix_fact_values_fact_document_year"
+        ]
+        ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        assert ddl.endswith("NULLS NOT DISTINCT")
+
+
+class TestCreateFactValues:
+    def test_upserts_one_row_per_key(self, recording_session):
+        FactRepository(recording_session).create_fact_values(
+            [
+                FactValueModel(fact_id="us-gaap:Revenues", value=1.0),
+                FactValueModel(fact_id="us-gaap:Revenues", value=2.0),
+                FactValueModel(fact_id="us-gaap:Revenues", value=3.0, fiscal_year=2023),
+            ]
+        )
+        [(sql, rows)] = recording_session.statements
+        assert "ON CONFLICT (fact_id, document_id, fiscal_year) DO UPDATE" in sql
+        assert [(row["value"], row["fiscal_year"]) for row in rows] == [
+            (2.0, UNKNOWN_FISCAL_YEAR),
+            (3.0, 2023),
+        ]
+
+    def test_empty(self, recording_session):
+        FactRepository(recording_session).create_fact_values([])
+        assert recording_session.statements == []
+
+
+class TestCopyFactValues:
+    def test_merges_through_load_table(self, recording_session):
+        count = FactRepository(recording_session).copy_fact_values(
+            iter([FactValueModel(fact_id="us-gaap:Revenues", value=1.0)])
+        )
+        assert count == 1
+        create, merge, drop = (sql for sql, _ in recording_session.statements)
+        assert create.startswith("CREATE TEMP TABLE fact_values_load ON COMMIT DROP")
+        assert "FROM fact_values_load" in merge
+        assert "ON CONFLICT (fact_id, document_id, fiscal_year) DO UPDATE" in merge
+        assert drop == "DROP TABLE fact_values_load"
+
+        [(sql, data)] = recording_session.copies
+        assert sql.startswith("COPY fact_values_load (")
+        fields = dict(zip(FACT_VALUE_FIELDS, data.rstrip("\n").split("\t")))
+        assert fields["fiscal_year"] == str(UNKNOWN_FISCAL_YEAR)
+        assert fields["document_id"] == "\\N"
+
+    def test_sends_batches(self, recording_session, monkeypatch):
+        monkeypatch.setattr(repository, "COPY_BATCH_SIZE", 2)
+        count = FactRepository(recording_session).copy_fact_values(
+            FactValueModel(fact_id=f"fact-{i}", fiscal_year=2023) for i in range(5)
+        )
+        assert count == 5
+        assert [data.count("\n") for _, data in recording_session.copies] == [2, 2, 1]
+
+
+class TestSearchFactsByEmbedding:
+    def test_skips_facts_without_embedding(self, recording_session):
+        FactRepository(recording_session).search_facts_by_embedding([1.0] * 3072)
+        *settings, (sql, _) = recording_session.statements
+        assert [setting for setting, _ in settings] == [
+            "SET LOCAL hnsw.ef_search = 50",
+            "SET LOCAL hnsw.iterative_scan = strict_order",
+        ]
+        assert "facts.embedding IS NOT NULL" in sql
+
+    def test_zero_query(self, recording_session):
+        repo = FactRepository(recording_session)
+        assert repo.search_facts_by_embedding([0.0] * 3072) == []
+        assert recording_session.statements == []
+
+
+def embedded_chunk(chunk_id, embedding, document_id="AAPL_10-K_2023"):
+    return EmbeddedChunk(
+        chunk=DocumentChunkModel(
+            chunk_id=chunk_id,
+            document_id=document_id,
+            content="Revenue grew.",
+            content_type="text",
+            location="Item 7",
+        ),
+        embedding=embedding,
+    )
+
+
+class TestCreateEmbeddings:
+    def test_upserts_one_row_per_chunk(self, recording_session):
+        EmbeddingRepository(recording_session).create_embeddings(
+            [
+                embedded_chunk("chunk-1", [1.0, 0.0]),
+                embedded_chunk("chunk-2", [0.0, 1.0]),
+                embedded_chunk("chunk-1", [0.5, 0.5]),
+            ]
+        )
+        (chunks_sql, chunk_rows), (embeddings_sql, embedding_rows) = (
+            recording_session.statements
+        )
+        assert "ON CONFLICT (chunk_id) DO NOTHING" in chunks_sql
+        assert [row["chunk_id"] for row in chunk_rows] == ["chunk-1", "chunk-2"]
+        assert "INSERT INTO chunk_embeddings" in embeddings_sql
+        assert (
+            "ON CONFLICT (chunk_id) DO UPDATE SET embedding = excluded.embedding"
+            in embeddings_sql
+        )
+        assert [
+            (row["chunk_id"], row["embedding"].tolist()) for row in embedding_rows
+        ] == [("chunk-1", [0.5, 0.5]), ("chunk-2", [0.0, 1.0])]
+
+    def test_empty(self, recording_session):
+        EmbeddingRepository(recording_session).create_embeddings([])
+        assert recording_session.statements == []
+
+    def test_missing_document(self, recording_session, monkeypatch):
+        def execute(statement, params=None):
+            raise IntegrityError(
+                "INSERT", params, SimpleNamespace(pgcode=FOREIGN_KEY_VIOLATION)
+            )
+
+        monkeypatch.setattr(recording_session, "execute", execute)
+        with pytest.raises(ValueError, match="Document not found: MISSING"):
+            EmbeddingRepository(recording_session).create_embeddings(
+                [embedded_chunk("chunk-1", [1.0, 0.0], document_id="MISSING")]
+            )
+
+    def test_other_integrity_errors_are_raised(self, recording_session, monkeypatch):
+        def execute(statement, params=None):
+            raise IntegrityError("INSERT", params, SimpleNamespace(pgcode="23505"))
+
+        monkeypatch.setattr(recording_session, "execute", execute)
+        with pytest.raises(IntegrityError):
+            EmbeddingRepository(recording_session).create_embeddings(
+                [embedded_chunk("chunk-1", [1.0, 0.0])]
+            )
+
+
+class TestCopyEmbeddings:
+    def test_merges_through_load_table(self, recording_session):
+        EmbeddingRepository(recording_session).copy_embeddings(
+            [("chunk-1", [1.0, 0.5]), ("chunk\t2\\", np.array([0.0, 1.0]))]
+        )
+        create, merge, drop = (sql for sql, _ in recording_session.statements)
+        assert create.startswith("CREATE TEMP TABLE chunk_embeddings_load")
+        assert "ON COMMIT DROP" in create
+        assert "SELECT DISTINCT ON (chunk_id)" in merge
+        assert "ON CONFLICT (chunk_id) DO UPDATE" in merge
+        assert drop == "DROP TABLE chunk_embeddings_load"
+
+        [(sql, data)] = recording_session.copies
+        assert sql == "COPY chunk_embeddings_load (chunk_id, embedding) FROM STDIN"
+        assert data == "chunk-1\t[1.0,0.5]\nchunk\\t2\\\\\t[0.0,1.0]\n"
+
+    def test_empty(self, recording_session):
+        EmbeddingRepository(recording_session).copy_embeddings([])
+        assert recording_session.statements == []
+        assert recording_session.copies == []
+
+
+class TestCopyFactValueEscaping:
+    def test_escapes_text_fields(self, recording_session):
+        FactRepository(recording_session).copy_fact_values(
+            [
+                FactValueModel(
+                    fact_id="us-gaap:Revenues",
+                    ticker="A\tB",
+                    accession_number="0000320193-23-000106\\x",
+                    form="10-K\nrestated\r",
+                    value=1.5,
+                    fiscal_year=2023,
+                )
+            ]
+        )
+        [(_, data)] = recording_session.copies
+        assert data.endswith("\n") and data.count("\n") == 1
+        fields = dict(zip(FACT_VALUE_FIELDS, data[:-1].split("\t")))
+        assert len(fields) == len(FACT_VALUE_FIELDS)
+        assert fields["ticker"] == "A\\tB"
+        assert fields["accession_number"] == "0000320193-23-000106\\\\x"
+        assert fields["form"] == "10-K\\nrestated\\r"
+        assert fields["value"] == "1.5"
+        assert fields["fiscal_year"] == "2023"
+        assert fields["start_date"] == "\\N"
+
+
+class TestSearchFactsByEmbeddings:
+    def test_one_statement_for_all_queries(self, recording_session):
+        results = FactRepository(recording_session).search_facts_by_embeddings(
+            [[1.0] * 3072, [0.0] * 3072, [0.5] * 3072], top_k=3
+        )
+        assert results == [[], [], []]
+        *settings, (sql, params) = recording_session.statements
+        assert [setting for setting, _ in settings] == [
+            "SET LOCAL hnsw.ef_search = 40",
+            "SET LOCAL hnsw.iterative_scan = strict_order",
+        ]
+        assert "FROM (VALUES (" in sql
+        assert sql.count("AS HALFVEC(3072))") == 2
+        assert "JOIN LATERAL (SELECT" in sql
+        assert "facts.embedding <#> queries.embedding" in sql
+        assert "ORDER BY queries.idx, nearest.distance" in sql
+        # The all-zero query is not sent; the other two keep their positions
+        assert "VALUES (%(param_1)s, CAST(%(param_2)s AS HALFVEC(3072)))" in sql
+        assert (params["param_1"], params["param_3"]) == (0, 2)
+        assert params["param_2"][0] == pytest.approx(3072**-0.5)
+
+    def test_groups_rows_by_query(self, recording_session, monkeypatch):
+        rows = [SimpleNamespace(idx=0), SimpleNamespace(idx=2), SimpleNamespace(idx=2)]
+        monkeypatch.setattr(
+            recording_session, "execute", lambda statement, params=None: iter(rows)
+        )
+        results = FactRepository(recording_session).search_facts_by_embeddings(
+            [[1.0, 0.0], [0.0, 0.0], [0.0, 1.0]]
+        )
+        assert results == [[rows[0]], [], rows[1:]]
+
+    def test_no_directional_queries(self, recording_session):
+        results = FactRepository(recording_session).search_facts_by_embeddings(
+            [[0.0, 0.0], []]
+        )
+        assert results == [[], []]
+        assert recording_session.statements == []
+
+
+@pytest.fixture
+def document_repo():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Company.__table__, Document.__table__])
+    with Session(engine) as session:
+        session.execute(
+            text(
+                "INSERT INTO documents (document_id, ticker, year) "
+                "VALUES ('AAPL_10-K_2023', 'AAPL', 2023)"
+            )
+        )
+        session.commit()
+        yield DocumentRepository(session)
+
+
+class TestRequireDocuments:
+    def test_existing(self, document_repo):
+        document_repo.require_documents(["AAPL_10-K_2023"])
+
+    def test_missing(self, document_repo):
+        with pytest.raises(ValueError, match="Document not found: MSFT_10-K_2023"):
+            document_repo.require_documents(["AAPL_10-K_2023", "MSFT_10-K_2023"])
+
+    def test_checked_once_per_transaction(self, document_repo):
+        db = document_repo.db
+        document_repo.require_documents(["AAPL_10-K_2023"])
+        db.execute(text("DELETE FROM documents"))
+        document_repo.require_documents(["AAPL_10-K_2023"])
+
+    def test_forgotten_after_commit(self, document_repo):
+        db = document_repo.db
+        document_repo.require_documents(["AAPL_10-K_2023"])
+        db.commit()
+        # Deleted by someone else after the transaction that confirmed it
+        db.execute(text("DELETE FROM documents"))
+        with pytest.raises(ValueError):
+            document_repo.require_documents(["AAPL_10-K_2023"])
+
+    def test_forgotten_after_rollback(self, document_repo):
+        db = document_repo.db
+        db.execute(
+            text(
+                "INSERT INTO documents (document_id, ticker, year) "
+                "VALUES ('MSFT_10-K_2023', 'MSFT', 2023)"
+            )
+        )
+        document_repo.require_documents(["MSFT_10-K_2023"])
+        db.rollback()
+        with pytest.raises(ValueError):
+            document_repo.require_documents(["MSFT_10-K_2023"])
@@ -0,0 +1,124 @@
+"""Tests for the transaction handling of the unified repository."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from farsight2.database.repository_factory import RepositoryFactory
+from farsight2.database.unified_repository import UnifiedRepository
+from farsight2.models.models import DocumentMetadata, ParsedDocument
+
+
+class TransactionSession:
+    """Session stand-in that counts commits and rollbacks."""
+
+    def __init__(self):
+        self.info = {}
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def session():
+    return TransactionSession()
+
+
+@pytest.fixture
+def repos(session):
+    return {
+        name: MagicMock(db=session)
+        for name in ("company", "document", "text_chunk", "table", "fact")
+    }
+
+
+@pytest.fixture
+def unified_repo(monkeypatch, repos):
+    monkeypatch.setattr(
+        RepositoryFactory, "create_all_repositories", staticmethod(lambda: repos)
+    )
+    return UnifiedRepository()
+
+
+@pytest.fixture
+def parsed_document():
+    return ParsedDocument(
+        document_id="AAPL_10-K_2023",
+        metadata=DocumentMetadata(
+            document_id="AAPL_10-K_2023",
+            ticker="AAPL",
+            year=2023,
+            filing_type="10-K",
+        ),
+        text_chunks=[],
+        tables=[],
+    )
+
+
+class TestUnitOfWork:
+    def test_commits_once(self, unified_repo, session):
+        with unified_repo.unit_of_work():
+            pass
+        assert (session.commits, session.rollbacks) == (1, 0)
+
+    def test_rolls_back_on_error(self, unified_repo, session):
+        with pytest.raises(RuntimeError):
+            with unified_repo.unit_of_work():
+                raise RuntimeError("write failed")
+        assert (session.commits, session.rollbacks) == (0, 1)
+
+    def test_parsed_document_in_one_commit(
+        self, unified_repo, repos, session, parsed_document
+    ):
+        unified_repo.create_parsed_document(parsed_document)
+        repos["document"].create_document.assert_called_once()
+        repos["text_chunk"].create_text_chunks.assert_called_once()
+        repos["table"].create_tables.assert_called_once()
+        assert (session.commits, session.rollbacks) == (1, 0)
+
+    def test_parsed_document_rolled_back_when_a_write_fails(
+        self, unified_repo, repos, session, parsed_document
+    ):
+        repos["table"].create_tables.side_effect = ValueError("bad table")
+        with pytest.raises(ValueError):
+            unified_repo.create_parsed_document(parsed_document)
+        assert (session.commits, session.rollbacks) == (0, 1)
+
+
+class TestNestedUnitOfWork:
+    def test_inner_joins_outer_transaction(self, unified_repo, session):
+        with unified_repo.unit_of_work():
+            with unified_repo.unit_of_work():
+                pass
+            assert session.commits == 0
+        assert (session.commits, session.rollbacks) == (1, 0)
+        assert session.info["unit_of_work_depth"] == 0
+
+    def test_repository_calls_join_outer_transaction(
+        self, unified_repo, session, parsed_document
+    ):
+        with unified_repo.unit_of_work():
+            unified_repo.create_parsed_document(parsed_document)
+            unified_repo.create_parsed_document(parsed_document)
+        assert session.commits == 1
+
+    def test_inner_error_rolls_back_once_at_outermost(self, unified_repo, session):
+        with pytest.raises(RuntimeError):
+            with unified_repo.unit_of_work():
+                with unified_repo.unit_of_work():
+                    raise RuntimeError("write failed")
+        assert (session.commits, session.rollbacks) == (0, 1)
+        assert session.info["unit_of_work_depth"] == 0
+
+    def test_caught_inner_error_keeps_outer_open(self, unified_repo, session):
+        with unified_repo.unit_of_work():
+            with pytest.raises(RuntimeError):
+                with unified_repo.unit_of_work():
+                    raise RuntimeError("write failed")
+            assert session.rollbacks == 0
+        assert (session.commits, session.rollbacks) == (1, 0)